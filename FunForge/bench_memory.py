@@ -0,0 +1,89 @@
+"""
+Memory benchmark for the scan data structures used by rename_files.
+
+Builds a synthetic library of FILE_COUNT files (names only, nothing is written to
+disk) and keeps it in memory the way rename_files does: the scanned file lists plus
+the stem maps. The "paths" mode uses pathlib.Path objects like FunForge did before
+FileRecord, the "records" mode uses FileRecord. Each mode runs in its own process
+so the reported peak RSS is not polluted by the other one.
+
+Usage:
+    python bench_memory.py [file_count]
+"""
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+FILE_COUNT = 1_000_000
+FILES_PER_DIRECTORY = 100
+SUFFIXES = [".mp4", ".funscript", ".pitch.funscript", ".srt", ".mkv"]
+
+
+def synthetic_files(file_count):
+    """Yield (parent directory, file name) pairs for a synthetic library tree."""
+    for index in range(file_count):
+        directory = index // FILES_PER_DIRECTORY
+        parent = f"/library/studio_{directory % 97:02d}/pack_{directory:06d}"
+        suffix = SUFFIXES[index % len(SUFFIXES)]
+        yield parent, f"Scene {index:07d} - Some Performer [1080p]{suffix}"
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def build(mode, file_count):
+    """Build the in-memory scan for one mode and return the objects to keep alive."""
+    if mode == "paths":
+        files = [Path(parent) / name for parent, name in synthetic_files(file_count)]
+    else:
+        import funforge
+        files = []
+        for parent, name in synthetic_files(file_count):
+            stem, suffix = os.path.splitext(name)
+            files.append(funforge.FileRecord(sys.intern(parent), stem, funforge.suffix_code(suffix), 1024, 0.0))
+    # Same maps rename_files builds on top of the scan
+    video_map = {f.stem: f for f in files if f.suffix in (".mp4", ".mkv")}
+    funscript_map = {f.stem: f for f in files if f.suffix == ".funscript"}
+    subtitle_map = {f.stem: f for f in files if f.suffix == ".srt"}
+    return files, video_map, funscript_map, subtitle_map
+
+
+def run_mode(mode, file_count):
+    baseline = peak_rss_mb()
+    if mode == "records":
+        import funforge  # noqa: F401  (exclude import cost from the measurement)
+        baseline = peak_rss_mb()
+    kept = build(mode, file_count)
+    print(f"{peak_rss_mb() - baseline:.1f} {len(kept[0])}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], int(sys.argv[3]))
+        return
+
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else FILE_COUNT
+    results = {}
+    for mode in ("paths", "records"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, str(file_count)],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.split()
+        results[mode] = float(output[0])
+        print(f"{mode:>8}: {results[mode]:8.1f} MB peak RSS for {int(output[1]):,} files")
+    print(f"   saved: {results['paths'] - results['records']:8.1f} MB "
+          f"({100 * (1 - results['records'] / results['paths']):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
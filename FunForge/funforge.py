@@ -1,7 +1,21 @@
 import os
 import io
+import errno
+import csv
+import sys
+import json
+import fnmatch
+import re
 import time
+import zlib
+import struct
+import heapq
+import shutil
+import tempfile
+import platform
+import subprocess
 import psutil
+import tarfile
 import zipfile
 import rarfile
 import threading
@@ -16,9 +30,24 @@ from rich.prompt import Prompt
 from rich.panel import Panel
 from rich.prompt import Confirm
 from rich.style import Style
+from rich.table import Table
 from rapidfuzz import fuzz, process
 from queue import Queue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from collections import defaultdict, deque, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import groupby
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 APP_NAME = "FunForge"
 APP_VERSION = "v1.0.0"
@@ -35,13 +64,129 @@ PROGRESS_DELAY = 0.3
 MESSAGE_DELAY = 0.5     
 
 # Easy-to-tweak parameters
-FUZZ_THRESHOLD = 45  # Threshold for fuzzy matching
+FUZZ_THRESHOLD = 70  # Minimum final (WRatio) score for a fuzzy match; the cutoff of the last cascade stage
+# Fuzzy matching cascade: (rapidfuzz.fuzz scorer, score cutoff, max survivors) per stage.
+# Each stage only rescores the survivors of the previous one, so put cheap scorers first.
+FUZZY_CASCADE = [
+    ("QRatio", 30, 25),  # Cheap prefilter over every candidate
+    ("WRatio", FUZZ_THRESHOLD, 3),  # Tolerates reordered words and extra tags; scores run higher than ratio, hence the higher cutoff
+]
+# Identifiers that tie a video to its script: (type, regex with an "id" group). A unique shared
+# identifier of a SCENE_ID_PAIRING_KINDS type pairs two files before any fuzzy scoring, and different
+# identifiers of the same type veto a fuzzy match. Values are compared by their letter and digit runs,
+# without leading zeros.
+SCENE_ID_PATTERNS = [
+    ("date", r"(?<!\d)(?P<id>(?:19|20)\d{2}[-._ ](?:0?[1-9]|1[0-2])[-._ ](?:0?[1-9]|[12]\d|3[01]))(?!\d)"),  # 2021-03-04
+    ("episode", r"(?<![^\W_])(?P<id>S\d{1,2}E\d{1,3})(?![^\W_])"),  # S01E02
+    ("code", r"(?<![^\W_])(?!(?:hevc|avc|fhd|uhd|qhd|hd|sd|vr|fps|scene|sc|ep|episode|part|pt|vol)-?\d)(?P<id>[A-Za-z]{2,6}-?\d{3,6})(?![^\W_])"),  # Studio codes like ABC-123, not HEVC265 or FHD1080
+    ("scene", r"(?<![^\W_])(?:scene|sc|ep|episode|part|pt|vol|#)[\s_]*(?P<id>\d{1,5})(?!\d)"),  # Scene 12, Part 2, #7
+    ("number", r"(?<!\d)(?P<id>\d{5,})(?!\d)"),  # Long numeric IDs
+]
+SCENE_ID_PAIRING_KINDS = {"date", "code", "number"}  # Specific enough to pair files on their own; episode, scene and part numbers repeat across titles and only veto
 SPINNER_DURATION = 2  # Duration for spinner animation in seconds
-ARCHIVE_EXTENSIONS = [".zip", ".rar"]
+PIPELINE_QUEUE_SIZE = 64  # Max directories / match sets buffered between pipeline stages
+LOW_MEMORY_EXACT_MATCHING = False  # Exact-match through sorted runs on disk instead of in memory (libraries larger than RAM)
+EXTERNAL_SORT_RUN_SIZE = 500_000  # Files per sorted run in low-memory exact matching
+EXTERNAL_SORT_DIR = None  # Folder for the sorted runs (None: the system temp folder)
+WALK_WORKERS = 8  # Directories listed concurrently while scanning (helps most on network shares)
+ADAPTIVE_IO = True  # Tune scan workers, chunk sizes and read-ahead to the detected storage; False always uses the values here
+# Per storage type: (scan workers to start with, most scan workers, copy chunk size, write buffer size, sequential read-ahead).
+# The scan worker count is tuned between 1 and the maximum from the observed listing throughput.
+STORAGE_PROFILES = {
+    "hdd": (2, 4, 4 * 1024 * 1024, 16 * 1024 * 1024, True),  # Seeks dominate: little concurrency, large sequential chunks
+    "ssd": (8, 32, 1024 * 1024, 8 * 1024 * 1024, False),
+    "nvme": (16, 64, 1024 * 1024, 8 * 1024 * 1024, False),  # Deep device queues need many requests in flight
+    "network": (16, 64, 4 * 1024 * 1024, 16 * 1024 * 1024, True),  # Latency dominates: many round-trips in flight, big reads
+}
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "sshfs", "fuse.sshfs", "9p", "afpfs", "davfs", "fuse.rclone", "ceph", "glusterfs", "fuse.glusterfs"}
+IO_TUNING_WINDOW = 32  # Directory listings per throughput sample when tuning scan concurrency
+IGNORE_GLOBS = []  # Directory names or paths relative to the root to skip, e.g. ["@eaDir", ".*", "Archive/*"]
+PLAN_VERSION = 1  # Format version written to JSON rename plans
+PLAN_FIELDS = ["group", "action", "kind", "source", "target", "reason"]
+PLAN_ACTIONS = {"exact", "rename", "not_changed"}
+REFERENCE_FILES = ["names_1.txt", "names_2.txt", "names_3.txt"]  # Name lists used to refine BUZZWORDS
+BATCH_WORKERS = 4  # Library roots processed in parallel by the batch runner (one process each)
+REVIEW_PAGE_SIZE = 20  # Pairs per page in the batch review table
+CLEANUP_PREVIEW_LIMIT = 50  # Max empty folders listed before the bulk delete prompt
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar.zst", ".tzst")
+ARCHIVE_EXTENSIONS = [".zip", ".rar", ".7z", *TAR_EXTENSIONS]
+EXTRACT_CHUNK_SIZE = 1024 * 1024  # 1MB chunks when copying archive members (storage without a profile in STORAGE_PROFILES)
+EXTRACT_BUFFER_SIZE = 8192 * 1024  # 8MB buffer size for extracted files (storage without a profile in STORAGE_PROFILES)
+EXTRACT_FREE_SPACE_MARGIN = 1024 * 1024 * 1024  # Free space left untouched on the target disk while extracting (1GB)
+TOOL_POLL_INTERVAL = 0.25  # Seconds between progress checks while an external tool extracts
+EXTRACT_MANIFEST_NAME = ".funforge-extract.jsonl"  # Checkpoint of completed members, kept in the extraction folder
+# Archives inside archives that are opened straight from the parent member stream
+NESTED_ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+NESTED_MEMORY_LIMIT = 64 * 1024 * 1024  # Inner archives up to 64MB are buffered in memory
+NESTED_MAX_DEPTH = 3  # How many archive levels deep nested archives are opened
+# External tools that can extract a whole RAR in one run (names on PATH or absolute paths)
+UNRAR_TOOLS = ("unrar", r"C:\Program Files\WinRAR\UnRAR.exe")
+SEVENZIP_TOOLS = ("7z", "7zz", r"C:\Program Files\7-Zip\7z.exe")
+ZSTD_TOOLS = ("zstd",)  # Used for .tar.zst when the zstandard module is not installed
+DECRYPTION_BACKEND = "auto"  # "auto"/"7z": decrypt zips with 7z when installed, "python": always use zipfile
+KNOWN_PASSWORDS_FILE = "passwords.txt"  # Optional list of archive passwords to try before asking
+FICLONE = 0x40049409  # Linux ioctl that clones a file's data blocks (reflink), from linux/fs.h
+LEASE_FILE_NAME = ".funforge-lease"  # Lock file of a folder (or, appended to its name, an archive) taken by a running instance
+LEASE_HEARTBEAT = 15  # Seconds between heartbeats of a held lease
+LEASE_TIMEOUT = 120  # Seconds without a heartbeat after which a lease counts as abandoned and is taken over
+DECISIONS_FILE = "decisions.jsonl"  # Remembered pair approvals/rejections; None always asks
+ARCHIVE_MANIFEST_FILE = "archive_manifests.jsonl"  # Cached archive listings by path, size and mtime; None always lists
+PASSWORD_PROBE_BYTES = 256 * 1024  # Bytes read from one member to verify a password
+ZIP_AES_METHOD = 99  # Compression method id used by WinZip AES encrypted members
 VIDEO_EXTENSIONS = [".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm", ".mpeg"]
 MULTI_AXIS_EXTENSIONS = [".pitch.funscript", ".roll.funscript", ".sway.funscript", ".surge.funscript", ".twist.funscript"]
 SUBTITLE_EXTENSIONS = [".srt", ".sub", ".ass", ".ssa", ".vtt"]
 BUZZWORDS = ["extended", "hd", "1080p", "4k", "remastered", "director's cut", "hq"]
+RESOLUTION_TAGS = ["720p", "1080p", "2160p", "4k", "1920x1080", "3840x2160"]
+NORMALIZE_CACHE_SIZE = 65536  # Max number of names kept in the normalization cache
+
+# Precompiled patterns for the name normalization pipeline. A resolution tag only
+# counts when it is not glued to other letters or digits ("4kids" stays intact).
+_RESOLUTION_ALTERNATION = "|".join(re.escape(tag) for tag in RESOLUTION_TAGS)
+_RESOLUTION_RE = re.compile(rf"(?<![^\W_])(?:{_RESOLUTION_ALTERNATION})(?![^\W_])", re.IGNORECASE)
+_RESOLUTION_STRIP_RE = re.compile(
+    rf"_(?:{_RESOLUTION_ALTERNATION})(?![^\W_])|(?<![^\W_])(?:{_RESOLUTION_ALTERNATION})(?![^\W_])_?",
+    re.IGNORECASE,
+)
+_EMPTY_BRACKETS_RE = re.compile(r"\[\s*\]|\(\s*\)")
+_REPEATED_SPACES_RE = re.compile(r" {2,}")
+_BRACKETS_RE = re.compile(r"[\[\]()]")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_SCENE_ID_RES = [(kind, re.compile(pattern, re.IGNORECASE)) for kind, pattern in SCENE_ID_PATTERNS]
+_ID_PART_RE = re.compile(r"[^\W\d_]+|\d+")
+
+# Multi-volume archive names: new-style RAR (name.part1.rar), old-style RAR (name.rar,
+# name.r00, name.r01, ... name.s00), split zip (name.z01, name.z02, ..., name.zip) and
+# byte-split archives (name.7z.001, name.zip.001, ...)
+_RAR_PART_RE = re.compile(r"^(?P<base>.+)\.part(?P<number>\d+)\.rar$", re.IGNORECASE)
+_LETTER_VOLUME_RE = re.compile(r"^(?P<base>.+)\.(?P<letter>[r-z])(?P<number>\d{2})$", re.IGNORECASE)
+_SPLIT_VOLUME_RE = re.compile(r"^(?P<base>.+\.(?:7z|zip|rar))\.(?P<number>\d{3})$", re.IGNORECASE)
+
+# key: casefolded name, used for exact comparisons
+# clean: brackets removed, underscores as spaces, lowercased (what clean_name returns)
+# display: original name with resolution tags stripped (what remove_resolution_tags returns)
+# resolutions: lowercased resolution tags found in the name
+# tokens: lowercased word tokens of the cleaned name
+# match: words of the display name, casefolded and space separated (used for fuzzy scoring)
+NormalizedName = namedtuple("NormalizedName", ["key", "clean", "display", "resolutions", "tokens", "match"])
+
+
+class StageError:
+    """Carries an exception from a pipeline stage thread to its consumer."""
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+_STAGE_END = object()  # Sentinel that closes a pipeline stage queue
+
+class ArchiveMember(namedtuple("ArchiveMember", ["filename", "file_size", "encrypted", "directory", "crc", "compress_type"],
+                               defaults=(None, None))):
+    """Archive member read from a listing (mirrors ZipInfo/RarInfo); compress_type is the format's method id or name."""
+    __slots__ = ()
+
+    def is_dir(self):
+        return self.directory
 
 ASCII_ART = r"""
 >>==================================================<<
@@ -94,34 +239,400 @@ def collect_files_with_extension(directory, extensions, recursive):
     files = []
     
     if recursive:
-        for root, _, filenames in os.walk(directory):
-            if "FunForge" in root:  
-                continue
-            for filename in filenames:
+        for root, entries in walk_directories(directory, recursive):
+            for entry in entries:
                 # Convert the file's extension to lowercase for comparison
-                if any(filename.lower().endswith(ext) for ext in extensions):
-                    files.append(Path(root) / filename)
+                if any(entry.name.lower().endswith(ext) for ext in extensions):
+                    files.append(Path(root) / entry.name)
     else:
         for entry in os.scandir(directory):
             if entry.is_file() and any(entry.name.lower().endswith(ext) for ext in extensions):
                 files.append(Path(entry.path))
     return files
 
+# Suffix table shared by all FileRecords; records only keep a small index into it
+_FILE_SUFFIXES = []
+_FILE_SUFFIX_CODES = {}
+
+def suffix_code(suffix):
+    """Return the small integer code for a file suffix, registering it on first use."""
+    code = _FILE_SUFFIX_CODES.get(suffix)
+    if code is None:
+        code = _FILE_SUFFIX_CODES[suffix] = len(_FILE_SUFFIXES)
+        _FILE_SUFFIXES.append(suffix)
+    return code
+
+class FileRecord:
+    """
+    Compact scan entry for one file. The parent directory string is shared by every
+    file in that directory and the Path object is only built when the file is touched.
+    Supports the parts of the Path API the matching code uses (name, stem, suffix,
+    exists, stat, rename) and os.fspath().
+    """
+    __slots__ = ("parent", "stem", "suffix_code", "size", "mtime")
+
+    def __init__(self, parent, stem, suffix_code, size=0, mtime=0.0):
+        self.parent = parent
+        self.stem = stem
+        self.suffix_code = suffix_code
+        self.size = size
+        self.mtime = mtime
+
+    @classmethod
+    def from_path(cls, path, size=0, mtime=0.0):
+        path = Path(path)
+        return cls(sys.intern(str(path.parent)), path.stem, suffix_code(path.suffix), size, mtime)
+
+    @property
+    def suffix(self):
+        return _FILE_SUFFIXES[self.suffix_code]
+
+    @property
+    def name(self):
+        return self.stem + _FILE_SUFFIXES[self.suffix_code]
+
+    @property
+    def path(self):
+        return Path(self.parent, self.name)
+
+    def __fspath__(self):
+        return os.path.join(self.parent, self.name)
+
+    __str__ = __fspath__
+
+    def __repr__(self):
+        return f"FileRecord({self.__fspath__()!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, FileRecord):
+            return NotImplemented
+        return (self.stem == other.stem and self.suffix_code == other.suffix_code
+                and self.parent == other.parent)
+
+    def __hash__(self):
+        return hash((self.parent, self.stem, self.suffix_code))
+
+    def exists(self):
+        return os.path.exists(self)
+
+    def stat(self):
+        return os.stat(self)
+
+    def rename(self, target):
+        os.rename(self, target)
+        return Path(target)
+
+# kind: "hdd", "ssd", "nvme", "network" or "unknown"
+# walk_workers / max_walk_workers: scan concurrency to start with and its upper bound
+# chunk_size / buffer_size: bytes per read when copying and write buffer of extracted files
+# sequential: advise the kernel of sequential reads (larger read-ahead) on archives being extracted
+StorageProfile = namedtuple("StorageProfile", ["kind", "walk_workers", "max_walk_workers", "chunk_size", "buffer_size", "sequential"])
+
+# Storage kinds from the least to the most forgiving; mixed paths get the first one that applies
+_STORAGE_ORDER = ("hdd", "network", "unknown", "ssd", "nvme")
+_storage_kinds = {}
+
+def storage_profile_for(kind):
+    """The StorageProfile for a storage kind; unknown storage uses the plain easy-to-tweak values."""
+    if not ADAPTIVE_IO or kind not in STORAGE_PROFILES:
+        return StorageProfile(kind, WALK_WORKERS, WALK_WORKERS * 4, EXTRACT_CHUNK_SIZE, EXTRACT_BUFFER_SIZE, False)
+    return StorageProfile(kind, *STORAGE_PROFILES[kind])
+
+def mounted_partition(path):
+    """The psutil partition entry whose mount point holds path (longest mount point prefix), or None."""
+    path = os.path.normcase(os.path.realpath(path))
+    best = None
+    try:
+        partitions = psutil.disk_partitions(all=True)
+    except Exception:
+        return None
+    for partition in partitions:
+        mountpoint = os.path.normcase(partition.mountpoint)
+        if path == mountpoint or path.startswith(mountpoint.rstrip(os.sep) + os.sep):
+            if best is None or len(mountpoint) > len(os.path.normcase(best.mountpoint)):
+                best = partition
+    return best
+
+def block_device(st_dev):
+    """
+    Linux: (device name, rotational) of the block device behind st_dev, read from
+    /sys/dev/block/MAJOR:MINOR. A partition reports through its parent disk. None if unknown.
+    """
+    device_dir = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+    for candidate in (device_dir, os.path.dirname(device_dir)):
+        try:
+            with open(os.path.join(candidate, "queue", "rotational")) as file:
+                return os.path.basename(candidate), file.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+def storage_kind(path):
+    """
+    Classify the storage holding path: "network" by mount type, "hdd"/"ssd"/"nvme" from
+    the block device's rotational flag, else "unknown". A path that does not exist yet
+    is classified by its nearest existing parent. Results are cached per device.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    try:
+        st_dev = os.stat(path).st_dev
+    except OSError:
+        return "unknown"
+    if st_dev in _storage_kinds:
+        return _storage_kinds[st_dev]
+
+    kind = "unknown"
+    partition = mounted_partition(path)
+    if partition is not None and (partition.fstype.lower() in NETWORK_FILESYSTEMS or "remote" in partition.opts.split(",")):
+        kind = "network"
+    elif hasattr(os, "major") and os.path.isdir("/sys/dev/block"):
+        device = block_device(st_dev)
+        if device is not None:
+            name, rotational = device
+            kind = "hdd" if rotational else "nvme" if name.startswith("nvme") else "ssd"
+    _storage_kinds[st_dev] = kind
+    return kind
+
+def storage_profile(*paths):
+    """StorageProfile for I/O that touches all of paths (e.g. source and destination): the slowest one wins."""
+    kinds = {storage_kind(path) for path in paths}
+    return storage_profile_for(next(kind for kind in _STORAGE_ORDER if kind in kinds))
+
+IO_PROFILE = storage_profile_for("unknown")
+
+def use_storage_profile(*paths):
+    """Detect the storage under paths and make its profile the one extraction reads and writes with."""
+    global IO_PROFILE
+    IO_PROFILE = storage_profile(*paths)
+    return IO_PROFILE
+
+def describe_storage_profile(profile):
+    """One line describing a StorageProfile for the console."""
+    return (f"{profile.kind} storage: {profile.walk_workers}-{profile.max_walk_workers} scan workers, "
+            f"{profile.chunk_size // (1024 * 1024)}MB chunks"
+            f"{', sequential read-ahead' if profile.sequential else ''}")
+
+def advise_sequential(file):
+    """Ask the kernel for aggressive read-ahead on a file the active profile reads sequentially."""
+    if not IO_PROFILE.sequential or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except (OSError, AttributeError, io.UnsupportedOperation):
+        pass
+
+class ThroughputTuner:
+    """
+    Hill-climbing concurrency limit. Every IO_TUNING_WINDOW completed operations the
+    throughput (units per second) is compared with the previous window: the limit keeps
+    moving in the same direction while throughput holds up and turns around when it drops.
+    """
+    def __init__(self, start, maximum, minimum=1):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = min(max(start, self.minimum), self.maximum)
+        self.direction = 1
+        self.operations = 0
+        self.units = 0
+        self.window_start = time.perf_counter()
+        self.last_rate = None
+
+    def completed(self, units=1):
+        """Record one finished operation that moved units (files, bytes, ...)."""
+        self.operations += 1
+        self.units += units
+        if self.operations < IO_TUNING_WINDOW:
+            return
+        now = time.perf_counter()
+        rate = self.units / max(now - self.window_start, 1e-9)
+        if self.last_rate is not None and rate < self.last_rate * 0.95:
+            self.direction = -self.direction
+        self.limit = min(max(self.limit + self.direction, self.minimum), self.maximum)
+        self.last_rate = rate
+        self.operations = self.units = 0
+        self.window_start = now
+
+def is_ignored_directory(path, root, excluded_paths):
+    """Check a directory against the exact excluded paths and the IGNORE_GLOBS patterns."""
+    if os.path.normcase(os.path.abspath(path)) in excluded_paths:
+        return True
+    if not IGNORE_GLOBS:
+        return False
+    name = os.path.basename(path)
+    relative = os.path.relpath(path, root).replace(os.sep, "/")
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative, pattern) for pattern in IGNORE_GLOBS)
+
+def list_directory(path):
+    """List one directory. Returns (path, file DirEntries, subdirectory paths, error)."""
+    files = []
+    subdirectories = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # Like os.walk, never descend into symlinked directories
+                        if not entry.is_symlink():
+                            subdirectories.append(entry.path)
+                        continue
+                except OSError:
+                    continue
+                files.append(entry)
+    except OSError as e:
+        return path, files, subdirectories, e
+    return path, files, subdirectories, None
+
+def walk_directories(directory, recursive, exclude=("FunForge",), log=None):
+    """
+    Yield (directory, DirEntries of its files) for every directory in the tree.
+    Subdirectories are listed concurrently in a thread pool, so on high-latency
+    network shares many scandir round-trips are in flight at once while a spinning
+    disk only gets a few; the number in flight then follows the observed throughput.
+    The excluded directories (by exact path below the root) and IGNORE_GLOBS matches
+    are pruned before they are ever listed. Subdirectories leased by another running
+    instance are left to it. Directories are yielded in completion order. Unreadable
+    and skipped directories are reported through log (printed by default).
+    """
+    root = str(directory)
+    excluded_paths = {os.path.normcase(os.path.abspath(os.path.join(root, name))) for name in exclude}
+    log = log or (lambda message: console.print(f"[yellow]{message}[/yellow]"))
+
+    def report(path, error):
+        log(f"Could not scan {path}: {str(error)}")
+
+    if not recursive:
+        path, files, _, error = list_directory(root)
+        if error:
+            report(path, error)
+        yield sys.intern(path), files
+        return
+
+    # Concurrency starts at the storage profile's worker count and follows the listing throughput
+    profile = storage_profile(root)
+    tuner = ThroughputTuner(profile.walk_workers, profile.max_walk_workers)
+    backlog = deque([root])
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=profile.max_walk_workers) as executor:
+        while backlog or in_flight:
+            # Bound the listings running ahead of the consumer
+            while backlog and len(in_flight) < tuner.limit:
+                in_flight.add(executor.submit(list_directory, backlog.popleft()))
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, files, subdirectories, error = future.result()
+                if error:
+                    report(path, error)
+                tuner.completed(1 + len(files) + len(subdirectories))
+                if path != root and any(entry.name == LEASE_FILE_NAME for entry in files):
+                    owner = foreign_lease(os.path.join(path, LEASE_FILE_NAME))
+                    if owner:
+                        log(f"Skipping {path}: being organized by {owner}")
+                        continue
+                backlog.extend(d for d in subdirectories if not is_ignored_directory(d, root, excluded_paths))
+                yield sys.intern(path), files
+
+def file_kind(filename, sibling_names=None):
+    """
+    Return 'video', 'funscript', 'subtitle' or 'archive' for a file name, or None.
+    An old-style RAR or split zip volume (name.r00, name.z01) is only an archive when
+    sibling_names, the lowercased names of the files in its folder, include the
+    name.rar or name.zip its set needs.
+    """
+    name_lower = filename.lower()
+    if name_lower.endswith(tuple(ext.lower() for ext in VIDEO_EXTENSIONS)):
+        return "video"
+    if name_lower.endswith(".funscript"):
+        return "funscript"
+    if name_lower.endswith(tuple(ext.lower() for ext in SUBTITLE_EXTENSIONS)):
+        return "subtitle"
+    if name_lower.endswith(tuple(ext.lower() for ext in ARCHIVE_EXTENSIONS)):
+        return "archive"
+    volume = archive_volume(filename)
+    if volume:
+        base, kind, _ = volume
+        if kind not in ("rar", "zip") or (sibling_names is not None and f"{base}.{kind}".lower() in sibling_names):
+            return "archive"
+    return None
+
+def classify_entries(parent, entries):
+    """Yield (kind, FileRecord) for the supported files among one directory's entries."""
+    names = {entry.name.lower() for entry in entries}
+    for entry in entries:
+        kind = file_kind(entry.name, names)
+        if kind is None:
+            continue
+        try:
+            stat = entry.stat()
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = 0, 0.0
+        stem, suffix = os.path.splitext(entry.name)
+        yield kind, FileRecord(parent, stem, suffix_code(suffix), size, mtime)
+
+def scan_files(directory, recursive, log=None):
+    """
+    Walk the directory once and sort video, funscript, subtitle and archive files
+    into lists of FileRecords.
+    """
+    scanned = {"video": [], "funscript": [], "subtitle": [], "archive": []}
+    for parent, entries in walk_directories(directory, recursive, log=log):
+        for kind, record in classify_entries(parent, entries):
+            scanned[kind].append(record)
+    return scanned
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name):
+    """Run a file name through the normalization pipeline once and cache the result."""
+    resolutions = frozenset(match.group(0).lower() for match in _RESOLUTION_RE.finditer(name))
+    display = name
+    if resolutions:
+        display = _EMPTY_BRACKETS_RE.sub("", _RESOLUTION_STRIP_RE.sub("", name))
+        display = _REPEATED_SPACES_RE.sub(" ", display).strip() or name
+    clean = _BRACKETS_RE.sub("", name).replace("_", " ").lower()
+    return NormalizedName(
+        key=name.casefold(),
+        clean=clean,
+        display=display,
+        resolutions=resolutions,
+        tokens=tuple(_TOKEN_RE.findall(clean)),
+        match=" ".join(_TOKEN_RE.findall(display.casefold())),
+    )
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def scene_ids(name):
+    """Return the identifiers (type, value) found in a name by SCENE_ID_PATTERNS, as a frozenset."""
+    ids = set()
+    for kind, pattern in _SCENE_ID_RES:
+        for match in pattern.finditer(name):
+            parts = _ID_PART_RE.findall(match.group("id").casefold())
+            ids.add((kind, "-".join(str(int(part)) if part.isdigit() else part for part in parts)))
+    return frozenset(ids)
+
+def ids_conflict(ids, other_ids):
+    """True when both names carry identifiers of a type but share none of that type."""
+    for kind in {kind for kind, _ in ids} & {kind for kind, _ in other_ids}:
+        if not {value for k, value in ids if k == kind} & {value for k, value in other_ids if k == kind}:
+            return True
+    return False
+
 def contains_buzzwords(filename):
     """Check if a filename contains any buzzwords."""
-    return sum(1 for word in BUZZWORDS if word.lower() in filename.lower())
+    key = normalize_name(filename).key
+    return sum(1 for word in BUZZWORDS if word in key)
 
 def similarity_score(name1, name2):
     """Calculate a similarity score between two file names."""
-    return fuzz.ratio(name1.lower(), name2.lower())
+    return fuzz.ratio(normalize_name(name1).key, normalize_name(name2).key)
 
 def clean_name(name):
     """Remove square brackets, parentheses and return the cleaned name for better matching."""
-    return name.replace("[", "").replace("]", "").replace("(", "").replace(")", "").replace("_", " ").lower()
+    return normalize_name(name).clean
 
 def get_resolution(file_path):
     """Extract resolution from a video file using pymediainfo."""
-    media_info = MediaInfo.parse(file_path)
+    media_info = MediaInfo.parse(os.fspath(file_path))
     for track in media_info.tracks:
         if track.track_type == "Video":
             return f"{track.width}x{track.height}"
@@ -129,24 +640,18 @@ def get_resolution(file_path):
 
 def remove_resolution_tags(name):
     """Remove resolution tags like 1080p, 4k, 2160p, 1920x1080, 3840x2160 from the filename."""
-    resolutions = ['720p', '1080p', '4k', '2160p', '1920x1080', '3840x2160']
-    for res in resolutions:
-        name = name.replace(f"_{res}", "").replace(f"{res}_", "").replace(res, "")
-    return name
+    return normalize_name(name).display
 
 def choose_better_name(name1, name2, prefer_funscript=False):
     """Choose the more descriptive and informative name."""
-    name1_cleaned = clean_name(name1)
-    name2_cleaned = clean_name(name2)
-
     name1_buzzwords = contains_buzzwords(name1)
     name2_buzzwords = contains_buzzwords(name2)
 
     comparison_details = []
 
     # Check if one name contains common identifiers like '[PMV]' or artist name
-    is_name1_funscript = "[PMV]" in name1 or "funscript" in name1.lower()
-    is_name2_funscript = "[PMV]" in name2 or "funscript" in name2.lower()
+    is_name1_funscript = "[PMV]" in name1 or "funscript" in normalize_name(name1).key
+    is_name2_funscript = "[PMV]" in name2 or "funscript" in normalize_name(name2).key
 
     if prefer_funscript:
         # Prefer the `.funscript` name when it has script-type identifiers or more buzzwords
@@ -175,134 +680,1057 @@ def choose_better_name(name1, name2, prefer_funscript=False):
 
 def is_resolution_difference(name1, name2):
     """Check if there is a resolution difference in the filenames."""
-    resolutions = ['720p', '1080p', '4k', '1920x1080', '3840x2160']
-    for res in resolutions:
-        if res in name1 and res not in name2:
+    return normalize_name(name1).resolutions != normalize_name(name2).resolutions
+
+def should_extract_file(filename):
+    """Helper function to determine if a file should be extracted."""
+    filename_lower = filename.lower()
+    # Check all supported extensions
+    return (any(filename_lower.endswith(ext.lower()) for ext in VIDEO_EXTENSIONS) or
+            filename_lower.endswith('.funscript') or  # Main funscript
+            any(filename_lower.endswith(ext.lower()) for ext in MULTI_AXIS_EXTENSIONS) or  # Multi-axis scripts
+            any(filename_lower.endswith(ext.lower()) for ext in SUBTITLE_EXTENSIONS))
+
+def extraction_progress():
+    """Create the progress display shared by all extraction backends."""
+    return Progress(
+        SpinnerColumn(),
+        "[progress.description]{task.description}",
+        BarColumn(),
+        TaskProgressColumn(),
+        TimeElapsedColumn(),
+    )
+
+def member_crc(file_info):
+    """Return the CRC-32 an archive records for a member (ZipInfo, RarInfo, ArchiveMember), or None."""
+    crc = getattr(file_info, "CRC", None)
+    return crc if crc is not None else getattr(file_info, "crc", None)
+
+def file_crc(path):
+    """CRC-32 of a file on disk."""
+    crc = 0
+    with open(path, 'rb', buffering=0) as file:
+        advise_sequential(file)
+        for chunk in iter(lambda: file.read(IO_PROFILE.chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+class ExtractionCheckpoint:
+    """
+    Sidecar manifest of the members already extracted from one archive. Each member
+    is appended as a JSON line (name, size, CRC, mtime) once it is completely on
+    disk, so an interrupted extraction restarts with only the missing members. The
+    first line identifies the archive; a manifest from another archive (or another
+    version of it) is ignored and replaced.
+    """
+
+    def __init__(self, archive_path, extract_dir):
+        self.extract_dir = Path(extract_dir)
+        self.path = self.extract_dir / EXTRACT_MANIFEST_NAME
+        stat = os.stat(archive_path)
+        self.header = {"archive": Path(archive_path).name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self.done = {}
+        self.valid = False  # True once the file on disk starts with our header
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                lines = iter(file)
+                if json.loads(next(lines)) != self.header:
+                    return
+                self.valid = True
+                for line in lines:
+                    try:
+                        entry = json.loads(line)
+                        self.done[entry["name"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn last line from an interruption
+        except (OSError, ValueError, StopIteration):
+            pass
+
+    def is_complete(self, name, size, crc=None):
+        """
+        Check whether a member is already fully extracted. A manifest entry that
+        matches the file on disk is trusted without reading it; a full-size file
+        without an entry (e.g. written by unrar/7z before an interruption) is
+        verified against the archive CRC and recorded.
+        """
+        target = self.extract_dir / name
+        try:
+            stat = target.stat()
+        except OSError:
+            return False
+        if stat.st_size != size:
+            return False
+        entry = self.done.get(name)
+        if (entry and entry["size"] == size and entry["mtime_ns"] == stat.st_mtime_ns
+                and (crc is None or entry["crc"] == crc)):
             return True
-        if res in name2 and res not in name1:
+        if crc is not None and file_crc(target) == crc:
+            self.record(name, size, crc)
             return True
-    return False
+        return False
 
-def extract_with_progress(archive_path, extract_dir, password=None):
-    """Extract an archive with progress bar and proper password handling."""
-    # Increase chunk size for better performance
-    CHUNK_SIZE = 1024 * 1024  # 1MB chunks
-    BUFFER_SIZE = 8192 * 1024  # 8MB buffer size
-    
-    def should_extract_file(filename):
-        """Helper function to determine if a file should be extracted."""
-        filename_lower = filename.lower()
-        # Check all supported extensions
-        return (any(filename_lower.endswith(ext.lower()) for ext in VIDEO_EXTENSIONS) or
-                filename_lower.endswith('.funscript') or  # Main funscript
-                any(filename_lower.endswith(ext.lower()) for ext in MULTI_AXIS_EXTENSIONS) or  # Multi-axis scripts
-                any(filename_lower.endswith(ext.lower()) for ext in SUBTITLE_EXTENSIONS))
-    
+    def pending(self, files_to_extract):
+        """Split members into (members still to extract, bytes already extracted)."""
+        pending = []
+        done_size = 0
+        for file_info in files_to_extract:
+            if self.is_complete(file_info.filename, file_info.file_size, member_crc(file_info)):
+                done_size += file_info.file_size
+            else:
+                pending.append(file_info)
+        return pending, done_size
+
+    def record(self, name, size, crc):
+        """Append a completed member to the manifest (flushed right away)."""
+        target = self.extract_dir / name
+        entry = {"name": name, "size": size, "crc": crc, "mtime_ns": target.stat().st_mtime_ns}
+        self.done[name] = entry
+        mode = 'a' if self.valid else 'w'
+        with open(self.path, mode, encoding='utf-8') as file:
+            if not self.valid:
+                file.write(json.dumps(self.header) + "\n")
+                self.valid = True
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+def copy_member(source, target_path, on_chunk=None):
+    """
+    Stream one archive member into target_path, truncating a partial file from an
+    earlier attempt. on_chunk(byte count) is called per chunk. Returns the CRC-32.
+    """
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    crc = 0
+    with open(target_path, 'wb', buffering=IO_PROFILE.buffer_size) as target:
+        while True:
+            chunk = source.read(IO_PROFILE.chunk_size)
+            if not chunk:
+                break
+            target.write(chunk)
+            crc = zlib.crc32(chunk, crc)
+            if on_chunk is not None:
+                on_chunk(len(chunk))
+    return crc
+
+def is_nested_archive(filename):
+    """Check if an archive member is itself an archive that can be opened from the stream."""
+    return filename.lower().endswith(NESTED_ARCHIVE_EXTENSIONS)
+
+class MemberView(io.RawIOBase):
+    """
+    Read-only seekable window onto a byte range of another file object, used to
+    open a large stored (uncompressed) inner archive in place. Every read seeks the
+    base first, so the view can share the base with the archive reader that owns it.
+    """
+
+    def __init__(self, base, offset, length):
+        self.base = base
+        self.offset = offset
+        self.length = length
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            position += self.position
+        elif whence == io.SEEK_END:
+            position += self.length
+        self.position = max(0, position)
+        return self.position
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.length - self.position)
+        if size <= 0:
+            return 0
+        self.base.seek(self.offset + self.position)
+        data = self.base.read(size)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+def stored_zip_member_offset(fileobj, zip_info):
+    """Return where a zip member's data starts, read from its local file header."""
+    fileobj.seek(zip_info.header_offset)
+    header = fileobj.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"bad local header for {zip_info.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    return zip_info.header_offset + 30 + name_length + extra_length
+
+def open_nested_source(open_member, size, stored_offset=None, base=None):
+    """
+    Return a seekable file object with an inner archive's bytes, without writing it
+    to the extraction folder: small archives are read into memory, large stored zip
+    members become a MemberView on the parent file, large members whose stream can
+    seek (zip, rar) are used directly, and anything else is spooled (in memory up
+    to NESTED_MEMORY_LIMIT).
+    """
+    if size > NESTED_MEMORY_LIMIT and stored_offset is not None and base is not None:
+        return io.BufferedReader(MemberView(base, stored_offset, size), buffer_size=IO_PROFILE.chunk_size)
+    source = open_member()
+    if size <= NESTED_MEMORY_LIMIT:
+        with source:
+            return io.BytesIO(source.read())
     try:
-        if archive_path.suffix.lower() == ".zip":
-            with zipfile.ZipFile(archive_path) as archive:
-                # Check if archive is password protected
-                is_encrypted = any(zip_info.flag_bits & 0x1 for zip_info in archive.filelist)
-                if is_encrypted and not password:
-                    return False, extract_dir, "encrypted archive"
-
-                # Filter files to extract before calculating total size
-                files_to_extract = [f for f in archive.filelist if should_extract_file(f.filename)]
-                total_size = sum(info.file_size for info in files_to_extract)
-                extracted_size = 0
-
-                with Progress(
-                    SpinnerColumn(),
-                    "[progress.description]{task.description}",
-                    BarColumn(),
-                    TaskProgressColumn(),
-                    TimeElapsedColumn(),
-                ) as progress:
-                    task = progress.add_task(
-                        description=f"Extracting {archive_path.name}",
-                        total=total_size
+        seekable = source.seekable()
+    except (AttributeError, OSError):  # Streamed tar members cannot even answer
+        seekable = False
+    if seekable:
+        return source
+    spooled = tempfile.SpooledTemporaryFile(max_size=NESTED_MEMORY_LIMIT)
+    with source:
+        shutil.copyfileobj(source, spooled, IO_PROFILE.chunk_size)
+    spooled.seek(0)
+    return spooled
+
+def nested_target(extract_dir, inner_name, member_name):
+    """Output path (relative, as posix) for a member of an inner archive, or None if it escapes the folder."""
+    relative = os.path.normpath(os.path.join(os.path.dirname(inner_name), member_name))
+    if relative.startswith("..") or os.path.isabs(relative):
+        return None
+    return Path(relative).as_posix()
+
+def extract_nested_archive(fileobj, inner_name, extract_dir, checkpoint, password=None, depth=1):
+    """
+    Extract the wanted files of an inner archive next to where the archive itself
+    would have been, recursing into archives it contains. Members go through the
+    same checkpoint as top-level members. Returns the number of files written.
+    """
+    written = 0
+    extract_dir = Path(extract_dir)
+
+    def extract_member(name, size, crc, open_member, stored_offset=None, base=None):
+        nonlocal written
+        relative = nested_target(extract_dir, inner_name, name)
+        if relative is None:
+            return
+        if should_extract_file(name):
+            if checkpoint.is_complete(relative, size, crc):
+                return
+            with open_member() as source:
+                crc = copy_member(source, extract_dir / relative)
+            checkpoint.record(relative, size, crc)
+            written += 1
+        elif is_nested_archive(name) and depth < NESTED_MAX_DEPTH:
+            with open_nested_source(open_member, size, stored_offset, base) as inner:
+                written += extract_nested_archive(inner, relative, extract_dir, checkpoint, password, depth + 1)
+
+    if inner_name.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as archive:
+            pwd = password.encode() if password else None
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                stored_offset = None
+                if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                    stored_offset = stored_zip_member_offset(fileobj, info)
+                extract_member(info.filename, info.file_size, info.CRC,
+                               lambda info=info: archive.open(info, pwd=pwd), stored_offset, fileobj)
+    else:
+        with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+            for member in archive:
+                if member.isfile():
+                    extract_member(member.name, member.size, None, lambda member=member: archive.extractfile(member))
+    return written
+
+def extract_nested_members(open_member, nested_members, extract_dir, checkpoint, password, progress, task,
+                           stored_offsets=None, base=None):
+    """
+    Open every inner archive of a parent archive from its member stream and extract
+    its contents. Progress advances by the inner archive's size. Returns an error or None.
+    """
+    for file_info in nested_members:
+        progress.update(task, description=f"Opening nested: {file_info.filename}", refresh=True)
+        stored_offset = (stored_offsets or {}).get(file_info.filename)
+        try:
+            with open_nested_source(lambda: open_member(file_info), file_info.file_size, stored_offset, base) as inner:
+                extract_nested_archive(inner, file_info.filename, extract_dir, checkpoint, password)
+        except Exception as e:
+            return f"{file_info.filename}: {str(e)}"
+        progress.advance(task, file_info.file_size)
+    return None
+
+@lru_cache(maxsize=None)
+def find_tool(candidates):
+    """Return the first available executable from a tuple of names or absolute paths."""
+    for candidate in candidates:
+        found = shutil.which(candidate)
+        if found:
+            return found
+        if os.path.isabs(candidate) and os.path.isfile(candidate):
+            return candidate
+    return None
+
+def extract_members_individually(open_member, files_to_extract, extract_dir, progress, task, checkpoint=None, extracted_size=0):
+    """
+    Copy archive members one by one through the Python archive module. A partial
+    file from an earlier attempt is truncated and rewritten, and each finished
+    member is recorded in the checkpoint. extracted_size is where progress starts.
+    Members whose path would end up outside extract_dir are skipped.
+    """
+    extract_root = os.path.abspath(extract_dir)
+
+    def on_chunk(size):
+        nonlocal extracted_size
+        extracted_size += size
+        progress.update(task,
+                     completed=extracted_size,
+                     description=f"Extracting: {file_info.filename}",
+                     refresh=True)
+
+    for file_info in files_to_extract:
+        target_path = os.path.abspath(os.path.join(extract_root, file_info.filename))
+        # Never write outside the extraction directory
+        if os.path.commonpath([extract_root, target_path]) != extract_root:
+            console.print(f"[red]Skipping {file_info.filename}: path leaves the extraction folder[/red]")
+            on_chunk(file_info.file_size)
+            continue
+        try:
+            source = open_member(file_info)
+            crc = copy_member(source, Path(target_path), on_chunk)
+            source.close()
+            if checkpoint is not None:
+                checkpoint.record(file_info.filename, file_info.file_size, crc)
+
+        except Exception as e:
+            return str(e)
+    return None
+
+def run_extraction_tool(command, expected_files, progress, task, done_size=0):
+    """
+    Run an external extraction command once and report progress by watching the
+    expected output files grow, on top of done_size already extracted bytes.
+    Returns (exit code, stderr text).
+    """
+    pending = {Path(path): size for path, size in expected_files}
+    finished_size = done_size
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=stderr_file)
+        while True:
+            running = process.poll() is None
+            in_progress_size = 0
+            for path, size in list(pending.items()):
+                try:
+                    current = path.stat().st_size
+                except OSError:
+                    continue
+                if current >= size:
+                    finished_size += size
+                    del pending[path]
+                    progress.update(task, description=f"Extracting: {path.name}")
+                else:
+                    in_progress_size += current
+            progress.update(task, completed=finished_size + in_progress_size, refresh=True)
+            if not running:
+                break
+            time.sleep(TOOL_POLL_INTERVAL)
+        stderr_file.seek(0)
+        return process.returncode, stderr_file.read().decode(errors="replace").strip()
+
+def build_tool_command(tool, archive_path, list_path, extract_dir, password):
+    """Build an extract command for unrar or 7z with an include list and output directory."""
+    if "unrar" in Path(tool).name.lower():
+        return [tool, "x", "-o+", "-y", "-idq", "-scfl", f"-p{password}" if password else "-p-",
+                str(archive_path), f"@{list_path}", str(extract_dir) + os.sep]
+    command = [tool, "x", "-y", "-bd", "-scsUTF-8", f"-o{extract_dir}", str(archive_path), f"@{list_path}"]
+    if password:
+        command.insert(2, f"-p{password}")
+    return command
+
+def extract_with_external_tool(archive_path, extract_dir, files_to_extract, password, progress, task, tools,
+                               checkpoint=None, done_size=0):
+    """
+    Extract all selected members in a single external tool invocation. For RAR this
+    means solid archives are decompressed once instead of once per member, and for
+    encrypted zips the decryption runs in native code instead of pure Python.
+    The tool overwrites partial files; after a successful run every member is
+    recorded in the checkpoint (the tool has verified their CRCs).
+    Returns (handled, error); handled is False when the caller should fall back
+    to per-member extraction.
+    """
+    tool = next((found for found in (find_tool(candidates) for candidates in tools) if found), None)
+    if not tool:
+        return False, None
+
+    list_fd, list_path = tempfile.mkstemp(prefix="funforge_", suffix=".lst", text=True)
+    try:
+        with os.fdopen(list_fd, "w", encoding="utf-8") as list_file:
+            for file_info in files_to_extract:
+                list_file.write(file_info.filename + "\n")
+
+        command = build_tool_command(tool, archive_path, list_path, extract_dir, password)
+        expected_files = [(Path(extract_dir) / f.filename, f.file_size) for f in files_to_extract]
+        returncode, stderr = run_extraction_tool(command, expected_files, progress, task, done_size)
+    except OSError:
+        return False, None
+    finally:
+        try:
+            os.unlink(list_path)
+        except OSError:
+            pass
+
+    if returncode == 0:
+        if checkpoint is not None:
+            for file_info in files_to_extract:
+                checkpoint.record(file_info.filename, file_info.file_size, member_crc(file_info))
+        return True, None
+    # unrar exits with 11 (and 7z reports "Wrong password") when the password is wrong
+    if returncode == 11 or "password" in stderr.lower():
+        return True, "wrong password"
+    console.print(f"[yellow]{Path(tool).name} failed ({stderr or f'exit code {returncode}'}), extracting member by member[/yellow]")
+    return False, None
+
+def choose_probe_member(members, solid=False):
+    """Pick the member that is cheapest to decrypt when verifying a password."""
+    files = [m for m in members if not m.is_dir()]
+    if not files:
+        return None
+    # Solid archives decompress from the start, so the first member is cheapest there
+    return files[0] if solid else min(files, key=lambda m: m.file_size)
+
+def read_probe(source, probe_member):
+    """Read a probe member fully when small, otherwise only its first bytes."""
+    with source:
+        if probe_member.file_size <= PASSWORD_PROBE_BYTES:
+            source.read()
+        else:
+            source.read(PASSWORD_PROBE_BYTES)
+
+@contextmanager
+def password_checker(archive_path, archive_format=None):
+    """
+    Open an archive once and yield (needs_password, check), where check(password)
+    verifies a password against a single small member without extracting anything.
+    archive_format overrides the extension, e.g. ".7z" for a split zip read by 7-Zip.
+    """
+    suffix = archive_format or archive_path.suffix.lower()
+    if suffix == ".zip":
+        with zipfile.ZipFile(archive_path) as archive:
+            encrypted = [info for info in archive.filelist if info.flag_bits & 0x1]
+            probe_member = choose_probe_member(encrypted)
+
+            def check(password):
+                if probe_member.compress_type == ZIP_AES_METHOD:
+                    # zipfile cannot decrypt AES at all, let 7z test the member instead
+                    sevenzip = find_tool(SEVENZIP_TOOLS)
+                    if not sevenzip:
+                        console.print("[red]This zip uses AES encryption, which requires 7-Zip to be installed.[/red]")
+                        return False
+                    result = subprocess.run(
+                        [sevenzip, "t", "-y", "-bd", f"-p{password}", str(archive_path), probe_member.filename],
+                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
                     )
+                    return result.returncode == 0
+                try:
+                    read_probe(archive.open(probe_member, pwd=password.encode()), probe_member)
+                    return True
+                except (RuntimeError, zipfile.BadZipFile, zlib.error):
+                    return False
 
-                    # Use ThreadPoolExecutor for parallel processing
-                    with ThreadPoolExecutor(max_workers=4) as executor:
-                        futures = []
-                        
-                        for file_info in files_to_extract:
-                            try:
-                                source = archive.open(file_info, pwd=password.encode() if password else None)
-                                target_path = Path(extract_dir) / file_info.filename
-                                target_path.parent.mkdir(parents=True, exist_ok=True)
-
-                                with open(target_path, 'wb', buffering=BUFFER_SIZE) as target:
-                                    while True:
-                                        chunk = source.read(CHUNK_SIZE)
-                                        if not chunk:
-                                            break
-                                        target.write(chunk)
-                                        extracted_size += len(chunk)
-                                        progress.update(task, 
-                                                     completed=extracted_size,
-                                                     description=f"Extracting: {file_info.filename}",
-                                                     refresh=True)
-                                source.close()
+            yield probe_member is not None, check
 
-                            except Exception as e:
-                                return False, extract_dir, str(e)
+    elif suffix == ".rar":
+        with rarfile.RarFile(archive_path) as archive:
+            def check(password):
+                try:
+                    archive.setpassword(password)
+                    probe_member = choose_probe_member(
+                        [info for info in archive.infolist() if info.needs_password()] or archive.infolist(),
+                        solid=archive.is_solid()
+                    )
+                    if probe_member is not None:
+                        read_probe(archive.open(probe_member), probe_member)
+                    return True
+                except (rarfile.Error, RuntimeError):
+                    return False
+
+            yield archive.needs_password(), check
+
+    elif suffix == ".7z":
+        members, error = list_7z_members(archive_path)
+        encrypted = [m for m in members if m.encrypted]
+
+        def check(password):
+            candidates = encrypted
+            if error == "encrypted archive":
+                # Encrypted headers: the member list is only readable with the right password
+                listed, list_error = list_7z_members(archive_path, password)
+                if list_error:
+                    return False
+                candidates = [m for m in listed if m.encrypted] or listed
+            probe_member = choose_probe_member(candidates)
+            if probe_member is None:
+                return True
+            result = subprocess.run(
+                [find_tool(SEVENZIP_TOOLS), "t", "-y", "-bd", f"-p{password}", str(archive_path), probe_member.filename],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            return result.returncode == 0
 
-                return True, extract_dir, None
+        yield error == "encrypted archive" or bool(encrypted), check
 
-        elif archive_path.suffix.lower() == ".rar":
-            with rarfile.RarFile(archive_path) as archive:
-                # Check if archive is password protected
-                is_encrypted = archive.needs_password()
-                if is_encrypted and not password:
-                    return False, extract_dir, "encrypted archive"
-
-                # Filter files to extract before calculating total size
-                files_to_extract = [f for f in archive.infolist() if should_extract_file(f.filename)]
-                total_size = sum(info.file_size for info in files_to_extract)
-                extracted_size = 0
-
-                with Progress(
-                    SpinnerColumn(),
-                    "[progress.description]{task.description}",
-                    BarColumn(),
-                    TaskProgressColumn(),
-                    TimeElapsedColumn(),
-                ) as progress:
-                    task = progress.add_task(
-                        description=f"Extracting {archive_path.name}",
-                        total=total_size
+    else:
+        yield False, lambda password: True
+
+def load_known_passwords(password_file=KNOWN_PASSWORDS_FILE):
+    """Load the optional list of known archive passwords, one per line."""
+    try:
+        with open(password_file, 'r', encoding='utf-8') as file:
+            return [line.rstrip("\r\n") for line in file if line.rstrip("\r\n")]
+    except FileNotFoundError:
+        return []
+
+def find_archive_password(archive_path, known_passwords, max_attempts=3, archive_format=None, members=None):
+    """
+    Find the password of an archive. Known passwords are tried first, then the user
+    is asked; every candidate is verified against one small member only. With a
+    listing (members) that has no encrypted member the archive is not opened at all.
+    Returns (needs_password, password); password is None when no password was found.
+    """
+    if members is not None and not any(member.encrypted for member in members):
+        return False, None
+    with password_checker(archive_path, archive_format) as (needs_password, check):
+        if not needs_password:
+            return False, None
+
+        for password in known_passwords:
+            if check(password):
+                console.print("[green]Archive unlocked with a known password.[/green]")
+                return True, password
+
+        for attempt in range(max_attempts):
+            password = Prompt.ask(
+                f"[red]Archive is password-protected. Enter password (attempt {attempt + 1}/{max_attempts}, or 'skip' to skip)[/red]"
+            )
+            if password.lower() == 'skip':
+                break
+            if check(password):
+                return True, password
+            console.print("[red]Wrong password.[/red]")
+
+    return True, None
+
+def extract_zip(archive_path, extract_dir, password=None):
+    """Zip backend: zipfile for plain archives, 7z for encrypted ones when installed."""
+    with zipfile.ZipFile(archive_path) as archive:
+        advise_sequential(archive.fp)
+        # Check if archive is password protected
+        is_encrypted = any(zip_info.flag_bits & 0x1 for zip_info in archive.filelist)
+        if is_encrypted and not password:
+            return False, extract_dir, "encrypted archive"
+
+        # Filter files to extract before calculating total size
+        files_to_extract = [f for f in archive.filelist if should_extract_file(f.filename)]
+        nested_members = [f for f in archive.filelist if not f.is_dir() and is_nested_archive(f.filename)]
+        total_size = sum(info.file_size for info in files_to_extract + nested_members)
+        # Members completed by an earlier, interrupted run are not extracted again
+        checkpoint = ExtractionCheckpoint(archive_path, extract_dir)
+        files_to_extract, done_size = checkpoint.pending(files_to_extract)
+        if not files_to_extract and not nested_members:
+            return True, extract_dir, None
+
+        open_member = lambda file_info: archive.open(file_info, pwd=password.encode() if password else None)
+        with extraction_progress() as progress:
+            task = progress.add_task(
+                description=f"Extracting {archive_path.name}",
+                total=total_size,
+                completed=done_size
+            )
+            handled, error = not files_to_extract, None
+            if not handled and is_encrypted and DECRYPTION_BACKEND in ("auto", "7z"):
+                # Decrypt in native code instead of zipfile's pure Python ZipCrypto
+                handled, error = extract_with_external_tool(
+                    archive_path, extract_dir, files_to_extract, password, progress, task, [SEVENZIP_TOOLS],
+                    checkpoint, done_size
+                )
+            if not handled:
+                if any(f.compress_type == ZIP_AES_METHOD for f in files_to_extract):
+                    return False, extract_dir, "AES-encrypted zip archives require 7-Zip"
+                progress.update(task, completed=done_size)
+                error = extract_members_individually(
+                    open_member, files_to_extract, extract_dir, progress, task, checkpoint, done_size
+                )
+            if error is None and nested_members:
+                # Inner archives are read from the parent; large stored ones through a view on the zip file
+                with open(archive_path, 'rb') as base:
+                    stored_offsets = {
+                        info.filename: stored_zip_member_offset(base, info) for info in nested_members
+                        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1
+                    }
+                    error = extract_nested_members(
+                        open_member, nested_members, extract_dir, checkpoint, password, progress, task,
+                        stored_offsets, base
                     )
 
-                    # Use ThreadPoolExecutor for parallel processing
-                    with ThreadPoolExecutor(max_workers=4) as executor:
-                        futures = []
+        return error is None, extract_dir, error
+
+def extract_rar(archive_path, extract_dir, password=None):
+    """RAR backend: one unrar/7z run, with rarfile's per-member extraction as fallback."""
+    with rarfile.RarFile(archive_path) as archive:
+        # Check if archive is password protected
+        is_encrypted = archive.needs_password()
+        if is_encrypted and not password:
+            return False, extract_dir, "encrypted archive"
+        if password:
+            archive.setpassword(password)
+
+        # Filter files to extract before calculating total size
+        files_to_extract = [f for f in archive.infolist() if not f.is_dir() and should_extract_file(f.filename)]
+        nested_members = [f for f in archive.infolist() if not f.is_dir() and is_nested_archive(f.filename)]
+        total_size = sum(info.file_size for info in files_to_extract + nested_members)
+        # Members completed by an earlier, interrupted run are not extracted again
+        checkpoint = ExtractionCheckpoint(archive_path, extract_dir)
+        files_to_extract, done_size = checkpoint.pending(files_to_extract)
+        if not files_to_extract and not nested_members:
+            return True, extract_dir, None
+
+        open_member = lambda file_info: archive.open(file_info, pwd=password if password else None)
+        with extraction_progress() as progress:
+            task = progress.add_task(
+                description=f"Extracting {archive_path.name}",
+                total=total_size,
+                completed=done_size
+            )
+            handled, error = not files_to_extract, None
+            if not handled:
+                handled, error = extract_with_external_tool(
+                    archive_path, extract_dir, files_to_extract, password, progress, task, [UNRAR_TOOLS, SEVENZIP_TOOLS],
+                    checkpoint, done_size
+                )
+            if not handled:
+                # Fallback: rarfile starts one tool process per member
+                progress.update(task, completed=done_size)
+                error = extract_members_individually(
+                    open_member, files_to_extract, extract_dir, progress, task, checkpoint, done_size
+                )
+            if error is None and nested_members:
+                error = extract_nested_members(open_member, nested_members, extract_dir, checkpoint, password, progress, task)
 
-                        for file_info in files_to_extract:
-                            try:
-                                source = archive.open(file_info, pwd=password if password else None)
-                                target_path = Path(extract_dir) / file_info.filename
-                                target_path.parent.mkdir(parents=True, exist_ok=True)
-
-                                with open(target_path, 'wb', buffering=BUFFER_SIZE) as target:
-                                    while True:
-                                        chunk = source.read(CHUNK_SIZE)
-                                        if not chunk:
-                                            break
-                                        target.write(chunk)
-                                        extracted_size += len(chunk)
-                                        progress.update(task, 
-                                                     completed=extracted_size,
-                                                     description=f"Extracting: {file_info.filename}",
-                                                     refresh=True)
-                                source.close()
+        return error is None, extract_dir, error
 
-                            except Exception as e:
-                                return False, extract_dir, str(e)
+def list_7z_members(archive_path, password=None):
+    """
+    List a 7z archive through the 7z binary. Returns (members, error); error mentions
+    the password when the archive headers are encrypted and no valid password was given.
+    """
+    sevenzip = find_tool(SEVENZIP_TOOLS)
+    if not sevenzip:
+        return [], "7z archives require 7-Zip to be installed"
+    command = [sevenzip, "l", "-slt", "-ba", str(archive_path)]
+    if password:
+        command.insert(2, f"-p{password}")
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True)
+    output = result.stdout.decode("utf-8", errors="replace")
+    if result.returncode != 0:
+        error = (result.stderr.decode(errors="replace") + output).strip()
+        if "password" in error.lower() or "encrypted" in error.lower():
+            return [], "encrypted archive"
+        return [], error or f"7z exited with code {result.returncode}"
+
+    members = []
+    # -slt prints one "Key = Value" block per member, separated by blank lines
+    for block in output.replace("\r\n", "\n").split("\n\n"):
+        fields = dict(line.split(" = ", 1) for line in block.splitlines() if " = " in line)
+        if "Path" not in fields:
+            continue
+        members.append(ArchiveMember(
+            filename=fields["Path"].replace("\\", "/"),
+            file_size=int(fields.get("Size") or 0),
+            encrypted=fields.get("Encrypted") == "+",
+            directory=fields.get("Folder") == "+" or "D" in fields.get("Attributes", "").split(" ")[0],
+            crc=int(fields["CRC"], 16) if fields.get("CRC") else None,
+            compress_type=fields.get("Method"),
+        ))
+    return members, None
+
+def extract_7z(archive_path, extract_dir, password=None):
+    """7z backend: list and extract with a single run of the local 7z binary."""
+    members, error = list_7z_members(archive_path, password)
+    if error:
+        return False, extract_dir, error
+    if any(m.encrypted for m in members) and not password:
+        return False, extract_dir, "encrypted archive"
+
+    files_to_extract = [m for m in members if not m.is_dir() and should_extract_file(m.filename)]
+    total_size = sum(m.file_size for m in files_to_extract)
+    # Members completed by an earlier, interrupted run are not extracted again
+    checkpoint = ExtractionCheckpoint(archive_path, extract_dir)
+    files_to_extract, done_size = checkpoint.pending(files_to_extract)
+    if not files_to_extract:
+        return True, extract_dir, None
+
+    with extraction_progress() as progress:
+        task = progress.add_task(
+            description=f"Extracting {archive_path.name}",
+            total=total_size,
+            completed=done_size
+        )
+        handled, error = extract_with_external_tool(
+            archive_path, extract_dir, files_to_extract, password, progress, task, [SEVENZIP_TOOLS],
+            checkpoint, done_size
+        )
+    if not handled:
+        return False, extract_dir, "7z could not extract the archive"
+    return error is None, extract_dir, error
+
+def open_tar_stream(archive_path, raw):
+    """
+    Open a tar archive in single-pass streaming mode on top of the raw file.
+    Zstandard is not handled by tarfile, so it goes through the zstandard module
+    or the zstd binary. Returns (tar, process); process is the zstd child, if any.
+    """
+    if not archive_path.name.lower().endswith((".tar.zst", ".tzst")):
+        return tarfile.open(fileobj=raw, mode="r|*"), None
+    if zstandard is not None:
+        return tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(raw), mode="r|"), None
+    zstd = find_tool(ZSTD_TOOLS)
+    if not zstd:
+        raise RuntimeError("tar.zst archives require the zstandard module or the zstd binary")
+    process = subprocess.Popen([zstd, "-dc"], stdin=raw, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return tarfile.open(fileobj=process.stdout, mode="r|"), process
+
+def extract_tar(archive_path, extract_dir, password=None):
+    """
+    Tar backend: members are filtered and written as the stream goes by, so nothing
+    is seeked or read twice. Progress is measured in compressed bytes consumed.
+    Tar has no member CRCs, so members completed by an earlier run are recognized
+    by the checkpoint entry alone; they are streamed past without being written.
+    """
+    extract_root = os.path.abspath(extract_dir)
+    checkpoint = ExtractionCheckpoint(archive_path, extract_dir)
+    # In an uncompressed tar, stream offsets are file offsets, so large inner archives get a view
+    plain_tar = archive_path.name.lower().endswith(".tar")
+    with open(archive_path, "rb") as raw, open(archive_path, "rb") as base, extraction_progress() as progress:
+        task = progress.add_task(
+            description=f"Extracting {archive_path.name}",
+            total=os.fstat(raw.fileno()).st_size
+        )
+        advise_sequential(raw)
+        tar, process = open_tar_stream(archive_path, raw)
+        try:
+            with tar:
+                for member in tar:
+                    if member.isfile() and is_nested_archive(member.name):
+                        progress.update(task, description=f"Opening nested: {member.name}", refresh=True)
+                        with open_nested_source(lambda: tar.extractfile(member), member.size,
+                                                member.offset_data if plain_tar else None, base) as inner:
+                            extract_nested_archive(inner, member.name, extract_dir, checkpoint, password)
+                        continue
+                    if not member.isfile() or not should_extract_file(member.name):
+                        continue
+                    target_path = Path(os.path.abspath(os.path.join(extract_root, member.name)))
+                    # Never write outside the extraction directory
+                    if os.path.commonpath([extract_root, str(target_path)]) != extract_root:
+                        continue
+                    if checkpoint.is_complete(member.name, member.size):
+                        continue
+                    target_path.parent.mkdir(parents=True, exist_ok=True)
+                    source = tar.extractfile(member)
+                    crc = 0
+                    with open(target_path, 'wb', buffering=IO_PROFILE.buffer_size) as target:
+                        while True:
+                            chunk = source.read(IO_PROFILE.chunk_size)
+                            if not chunk:
+                                break
+                            target.write(chunk)
+                            crc = zlib.crc32(chunk, crc)
+                            # The shared file offset also tracks what a zstd child has read
+                            progress.update(task,
+                                         completed=os.lseek(raw.fileno(), 0, os.SEEK_CUR),
+                                         description=f"Extracting: {member.name}",
+                                         refresh=True)
+                    checkpoint.record(member.name, member.size, crc)
+        finally:
+            # A truncated or corrupt stream already surfaces as a tarfile error
+            if process is not None:
+                process.stdout.close()
+                process.wait()
+    return True, extract_dir, None
+
+# Extraction backends by archive extension. Every backend takes
+# (archive_path, extract_dir, password) and returns (success, extract_dir, error).
+ARCHIVE_BACKENDS = [
+    ((".zip",), extract_zip),
+    ((".rar",), extract_rar),
+    ((".7z",), extract_7z),
+    (TAR_EXTENSIONS, extract_tar),
+]
+
+def archive_backend(archive_path, archive_format=None):
+    """Return the extraction backend for an archive (or a given format extension), or None if unsupported."""
+    name = archive_format or archive_path.name.lower()
+    for extensions, backend in ARCHIVE_BACKENDS:
+        if name.endswith(extensions):
+            return backend
+    return None
+
+def archive_stem(archive_path):
+    """Return the archive name without its (possibly double) archive extension."""
+    name = archive_path.name
+    for ext in sorted(ARCHIVE_EXTENSIONS, key=len, reverse=True):
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return archive_path.stem
+
+def archive_volume(filename):
+    """
+    Parse a multi-volume archive name. Returns (base name, kind, volume number) for
+    a volume, kind being "part" (name.partN.rar), "rar" (name.rNN), "zip" (name.zNN)
+    or "split" (name.7z.NNN); None for any other name. The name.rar that starts an
+    old-style RAR set and the name.zip that ends a split zip are matched by their set.
+    """
+    match = _RAR_PART_RE.match(filename)
+    if match:
+        return match["base"], "part", int(match["number"])
+    match = _LETTER_VOLUME_RE.match(filename)
+    if match:
+        letter = match["letter"].lower()
+        if letter == "z":
+            return match["base"], "zip", int(match["number"])
+        # .rar is volume 0, .r00-.r99 are 1-100, then .s00 and so on
+        return match["base"], "rar", (ord(letter) - ord("r")) * 100 + int(match["number"]) + 1
+    match = _SPLIT_VOLUME_RE.match(filename)
+    if match:
+        return match["base"], "split", int(match["number"])
+    return None
+
+# first: the volume extraction starts from; volumes: every file of the set in order;
+# archive_format: extension whose backend handles the set (None: by the file name);
+# missing: True when a volume is missing, so the set cannot be extracted yet
+ArchiveSet = namedtuple("ArchiveSet", ["first", "volumes", "stem", "archive_format", "missing"])
+
+# Backend per multi-volume kind: RAR sets go through rarfile/unrar, split zips and byte-split sets need 7-Zip
+_VOLUME_FORMATS = {"part": ".rar", "rar": ".rar", "zip": ".7z", "split": ".7z"}
+
+def is_later_rar_volume(path):
+    """True when a RAR file is a later volume of a multi-volume set, going by its own headers."""
+    try:
+        rarfile.RarFile(path, part_only=True).close()
+    except rarfile.NeedFirstVolume:
+        return True
+    except Exception:
+        pass
+    return False
 
-                return True, extract_dir, None
+def group_archive_sets(archive_paths):
+    """Group archive files into single archives and multi-volume sets, each extracted once from its first volume."""
+    volume_groups = defaultdict(list)  # (parent, lowercased base, kind) -> [(volume number, path)]
+    bases = {}  # Same key -> base name as written on disk
+    singles = []
+    for path in archive_paths:
+        parsed = archive_volume(path.name)
+        if parsed:
+            base, kind, number = parsed
+            key = (path.parent, base.lower(), kind)
+            volume_groups[key].append((number, path))
+            bases.setdefault(key, base)
+        else:
+            singles.append(path)
+
+    archive_sets = []
+    for path in singles:
+        name_lower = path.name.lower()
+        if name_lower.endswith(".rar") and (path.parent, path.stem.lower(), "rar") in volume_groups:
+            volume_groups[(path.parent, path.stem.lower(), "rar")].append((0, path))
+        elif name_lower.endswith(".zip") and (path.parent, path.stem.lower(), "zip") in volume_groups:
+            # The .zip holds the central directory and comes last
+            volume_groups[(path.parent, path.stem.lower(), "zip")].append((float("inf"), path))
+        else:
+            archive_sets.append(ArchiveSet(path, [path], archive_stem(path), None, False))
+
+    for key, numbered in list(volume_groups.items()):
+        kind = key[2]
+        if kind == "part" and len(numbered) == 1 and numbered[0][0] != 1 and not is_later_rar_volume(numbered[0][1]):
+            # Only named like a volume (e.g. Scene.part2.rar), but a complete archive of its own
+            path = numbered[0][1]
+            archive_sets.append(ArchiveSet(path, [path], archive_stem(path), None, False))
+            continue
+        numbered.sort(key=lambda item: item[0])
+        numbers = [number for number, _ in numbered]
+        volumes = [path for _, path in numbered]
+        if kind == "zip":
+            # Extraction starts from the .zip; 7-Zip finds the .zNN parts next to it
+            first = volumes[-1]
+            missing = numbers[-1] != float("inf") or numbers[:-1] != list(range(1, len(numbers)))
+        else:
+            start = 0 if kind == "rar" else 1
+            first = volumes[0]
+            missing = numbers != list(range(start, start + len(numbers)))
+        stem = archive_stem(Path(bases[key])) if kind == "split" else bases[key]
+        archive_sets.append(ArchiveSet(first, volumes, stem, _VOLUME_FORMATS[kind], missing))
+
+    archive_sets.sort(key=lambda archive_set: archive_set.first.name.lower())
+    return archive_sets
+
+def collect_archive_sets(directory):
+    """Find the archives directly in a directory and group their volumes into sets."""
+    with os.scandir(directory) as entries:
+        files = [entry for entry in entries if entry.is_file()]
+    names = {entry.name.lower() for entry in files}
+    archive_paths = [Path(entry.path) for entry in files if file_kind(entry.name, names) == "archive"]
+    return group_archive_sets(archive_paths)
+
+def list_archive_members(archive_path, archive_format=None):
+    """
+    List an archive's members as ArchiveMembers without extracting anything, or
+    return None when the listing is not cheap or not possible (compressed tars must
+    be decompressed to be listed, encrypted RAR/7z headers need the password).
+    """
+    suffix = archive_format or archive_path.suffix.lower()
+    try:
+        if suffix == ".zip":
+            with zipfile.ZipFile(archive_path) as archive:
+                return [ArchiveMember(info.filename, info.file_size, bool(info.flag_bits & 0x1), info.is_dir(), info.CRC,
+                                      info.compress_type) for info in archive.infolist()]
+        if suffix == ".rar":
+            with rarfile.RarFile(archive_path) as archive:
+                infos = archive.infolist()
+                if archive.needs_password() and not infos:
+                    # Encrypted headers: without the password rarfile lists nothing, which is not an empty archive
+                    return None
+                return [ArchiveMember(info.filename, info.file_size, info.needs_password(), info.is_dir(), info.CRC,
+                                      info.compress_type) for info in infos]
+        if suffix == ".7z":
+            members, error = list_7z_members(archive_path)
+            return None if error else members
+        if archive_path.name.lower().endswith(".tar"):
+            # Plain tar headers are read by seeking past the member data
+            with tarfile.open(archive_path, "r:") as archive:
+                return [ArchiveMember(member.name, member.size, False, member.isdir()) for member in archive.getmembers()]
+    except (OSError, zipfile.BadZipFile, rarfile.Error, tarfile.TarError):
+        return None
+    return None
+
+class ArchiveManifestCache:
+    """
+    Remembered archive listings, so unchanged archives are not opened (or listed by an
+    external tool) again on every run. A listing is keyed by the archive path and is
+    only used while the size and modification time of every volume are unchanged; an
+    archive that could not be listed is not remembered, so it is tried again on the next
+    run (its headers may need a password, or 7-Zip may be installed by then). Listings are kept in an
+    append-only JSON lines file (later lines win), which is compacted when it has grown
+    to several times the number of archives it describes.
+    """
 
+    def __init__(self, path=ARCHIVE_MANIFEST_FILE):
+        self.path = path
+        self.entries = {}  # archive path -> (volume signatures, [ArchiveMember] or None)
+        self.stats = {"cached": 0, "listed": 0}
+        self.lines = 0
+        if not path:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    self.lines += 1
+                    try:
+                        entry = json.loads(line)
+                        members = entry["members"]
+                        if members is None:
+                            continue  # Written by older versions for archives that could not be listed
+                        members = [ArchiveMember(*fields) for fields in members]
+                        self.entries[entry["archive"]] = ([tuple(volume) for volume in entry["volumes"]], members)
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Skip a torn or hand-edited line
+        except FileNotFoundError:
+            pass
+        if self.lines > 2 * len(self.entries) + 100:
+            self.compact()
+
+    @staticmethod
+    def signature(volumes):
+        """(size, mtime in ns) of every volume; a listing is only valid while this is unchanged."""
+        signature = []
+        for volume in volumes:
+            stat = os.stat(volume)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        return signature
+
+    def members(self, archive_path, archive_format=None, volumes=None):
+        """Return the ArchiveMembers of an archive (None if it cannot be listed cheaply), listing it only when it changed."""
+        key = os.path.abspath(archive_path)
+        signature = self.signature(volumes or [archive_path])
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] == signature:
+            self.stats["cached"] += 1
+            return cached[1]
+        members = list_archive_members(archive_path, archive_format)
+        self.stats["listed"] += 1
+        if members is not None:
+            self.entries[key] = (signature, members)
+            self.append(key, signature, members)
+        return members
+
+    @staticmethod
+    def line(key, signature, members):
+        entry = {"archive": key, "volumes": signature, "members": [list(member) for member in members]}
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+    def append(self, key, signature, members):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(self.line(key, signature, members))
+            self.lines += 1
+        except OSError:
+            pass  # The cache is only an optimization
+
+    def compact(self):
+        """Rewrite the file with one line per archive that still exists."""
+        self.entries = {key: entry for key, entry in self.entries.items() if os.path.exists(key)}
+        temporary_path = f"{self.path}.tmp"
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                for key, (signature, members) in self.entries.items():
+                    file.write(self.line(key, signature, members))
+            os.replace(temporary_path, self.path)
+            self.lines = len(self.entries)
+        except OSError:
+            pass
+
+# size: bytes the extraction writes to the target disk
+# estimated: True when the archive could not be listed and its own size stands in
+# members: the listing (ArchiveMembers) the size was computed from, None when estimated
+ExtractionJob = namedtuple("ExtractionJob", ["archive_set", "size", "estimated", "members"])
+
+def extraction_job(archive_set, manifests=None):
+    """Work out how much disk space extracting an archive set needs, from the manifest cache when given."""
+    if manifests is not None:
+        members = manifests.members(archive_set.first, archive_set.archive_format, archive_set.volumes)
+    else:
+        members = list_archive_members(archive_set.first, archive_set.archive_format)
+    if members is None:
+        # Video packs barely compress, so the archive size is a fair estimate
+        return ExtractionJob(archive_set, sum(volume.stat().st_size for volume in archive_set.volumes), True, None)
+    size = sum(member.file_size for member in members
+               if not member.is_dir() and (should_extract_file(member.filename) or is_nested_archive(member.filename)))
+    return ExtractionJob(archive_set, size, False, members)
+
+def next_extraction_job(jobs, free_space):
+    """The largest job that fits into free_space (largest first keeps the tail of the run short), or None."""
+    fitting = [job for job in jobs if job.size <= free_space]
+    return max(fitting, key=lambda job: job.size) if fitting else None
+
+def format_size(size):
+    """Human readable size in MB or GB."""
+    return f"{size / (1024 ** 3):.2f} GB" if size >= 1024 ** 3 else f"{size / (1024 * 1024):.2f} MB"
+
+def extract_with_progress(archive_path, extract_dir, password=None, archive_format=None):
+    """Extract an archive (or the set starting at this volume) with progress bar and proper password handling."""
+    backend = archive_backend(archive_path, archive_format)
+    if backend is None:
+        return False, extract_dir, f"unsupported archive format: {archive_path.name}"
+    # Chunk sizes and read-ahead follow the slower of the archive's and the target's storage
+    use_storage_profile(archive_path, extract_dir)
+    try:
+        return backend(archive_path, extract_dir, password)
     except Exception as e:
         return False, extract_dir, str(e)
 
@@ -390,15 +1818,41 @@ def process_extracted_directory(directory, extracted_dir, reference_names, tag_w
     return all_matched
 
 def handle_archives(directory):
-    """Unpack zip and rar archives and prepare files for renaming."""
-    archive_files = collect_files_with_extension(directory, ARCHIVE_EXTENSIONS, recursive=False)
+    """
+    Unpack zip, rar, 7z and tar archives (and multi-volume sets) and prepare files for renaming.
+    Extraction is scheduled by free space: the uncompressed size of every archive is read
+    from its listing, the largest archive that fits on the target disk goes next, and an
+    archive whose files were all matched is deleted before the next one starts. Each archive
+    is leased while it is extracted, so instances sharing the folder split the archives.
+    """
+    archive_sets = collect_archive_sets(directory)
     
-    if not archive_files:
+    if not archive_sets:
         return []
 
     console.print("[yellow]Found the following archives:[/yellow]")
-    for archive_path in archive_files:
-        console.print(f"  - {archive_path.name}")
+    manifests = ArchiveManifestCache()
+    jobs = []
+    for archive_set in archive_sets:
+        if archive_set.missing:
+            console.print(f"  - {archive_set.first.name} ({len(archive_set.volumes)} volumes) [red](incomplete set)[/red]")
+            continue
+        job = extraction_job(archive_set, manifests)
+        volumes = f"{len(archive_set.volumes)} volumes, " if len(archive_set.volumes) > 1 else ""
+        if not job.estimated and job.size == 0:
+            # The listing shows nothing worth extracting, so the archive is left closed
+            console.print(f"  - {archive_set.first.name} ({volumes}no video, script or subtitle files) [yellow](skipped)[/yellow]")
+            continue
+        jobs.append(job)
+        console.print(f"  - {archive_set.first.name} ({volumes}{'about ' if job.estimated else ''}{format_size(job.size)} to extract)")
+    if manifests.stats["cached"]:
+        console.print(f"[cyan]{manifests.stats['cached']} archive listings reused, {manifests.stats['listed']} read.[/cyan]")
+    if not jobs:
+        return []
+    console.print(
+        f"[yellow]{format_size(sum(job.size for job in jobs))} to extract, "
+        f"{format_size(psutil.disk_usage(os.fspath(directory)).free)} free on the target disk.[/yellow]"
+    )
 
     # Updated prompt style
     console.print(create_styled_prompt("Extract and process these archives?"))
@@ -407,146 +1861,177 @@ def handle_archives(directory):
         return []
 
     extracted_directories = []
-    processed_archives = []  # Keep track of successfully processed archives
     
     # Create Directory Structure
     funforge_dir = directory / "FunForge"  
     already_same_name_dir = funforge_dir / "Already Same Name"
     already_same_name_dir.mkdir(parents=True, exist_ok=True)
     
-    # Process each archive
-    for archive_path in archive_files:
-        extract_dir = directory / archive_path.stem
-        extract_dir.mkdir(exist_ok=True)
+    known_passwords = load_known_passwords()
+
+    for archive_set in archive_sets:
+        if archive_set.missing:
+            console.print(f"\n[yellow]Skipping {archive_set.first.name}: one or more volumes of the set are missing[/yellow]")
+
+    # Process the archives largest first while they fit; a multi-volume set is extracted once, starting from its first volume
+    while jobs:
+        # Measured again every time, so deleted archives and extracted files are accounted for
+        free_space = psutil.disk_usage(os.fspath(directory)).free - EXTRACT_FREE_SPACE_MARGIN
+        job = next_extraction_job(jobs, free_space)
+        if job is None:
+            for job in jobs:
+                console.print(
+                    f"\n[red]Skipping {job.archive_set.first.name}: needs {format_size(job.size)}, "
+                    f"only {format_size(max(free_space, 0))} free (keeping {format_size(EXTRACT_FREE_SPACE_MARGIN)} spare)[/red]"
+                )
+            break
+        jobs.remove(job)
+        archive_set = job.archive_set
+        archive_path = archive_set.first
+        # Another instance working on the same folder may already have this archive
+        lease = Lease(str(archive_set.first) + LEASE_FILE_NAME)
+        if not lease.acquire():
+            console.print(f"\n[yellow]Skipping {archive_set.first.name}: being extracted by {lease.holder()}[/yellow]")
+            continue
+        try:
+            extract_dir = directory / archive_set.stem
+            extract_dir.mkdir(exist_ok=True)
         
-        console.print(f"\n[yellow]Processing {archive_path.name}...[/yellow]")
+            console.print(f"\n[yellow]Processing {archive_path.name}...[/yellow]")
         
-        extraction_successful = False
-        password = None
-        max_attempts = 3
-        attempt = 0
+            extraction_successful = False
 
-        while not extraction_successful and attempt < max_attempts:
             try:
-                success, _, error = extract_with_progress(archive_path, extract_dir, password)
-                
-                if success:
-                    extraction_successful = True
-                    console.print(f"[green]Successfully extracted to {extract_dir}[/green]")
-                    break
-                elif 'encrypted' in str(error).lower() or 'password' in str(error).lower():
-                    password = Prompt.ask(
-                        f"[red]Archive is password-protected. Enter password (attempt {attempt + 1}/{max_attempts}, or 'skip' to skip)[/red]"
-                    )
-                    if password.lower() == 'skip':
-                        break
-                    attempt += 1
+                # Verify the password once against a small member before bulk extraction
+                needs_password, password = find_archive_password(archive_path, known_passwords, archive_format=archive_set.archive_format,
+                                                                 members=job.members)
+                if needs_password and password is None:
+                    console.print(f"[yellow]Skipping password-protected archive {archive_path.name}[/yellow]")
                 else:
-                    console.print(f"[red]Error extracting: {error}[/red]")
-                    break
+                    success, _, error = extract_with_progress(archive_path, extract_dir, password, archive_set.archive_format)
+                    if success:
+                        extraction_successful = True
+                        console.print(f"[green]Successfully extracted to {extract_dir}[/green]")
+                    else:
+                        console.print(f"[red]Error extracting: {error}[/red]")
             except Exception as e:
                 console.print(f"[red]Unexpected error: {str(e)}[/red]")
-                break
 
-        # Process the extracted files immediately if extraction was successful
-        if extraction_successful and extract_dir.exists() and any(extract_dir.iterdir()):
-            # Collect all files from the extracted directory
-            video_files = collect_files_with_extension(extract_dir, VIDEO_EXTENSIONS, recursive=False)
-            funscript_files = collect_files_with_extension(extract_dir, [".funscript"] + MULTI_AXIS_EXTENSIONS, recursive=False)
-            subtitle_files = collect_files_with_extension(extract_dir, SUBTITLE_EXTENSIONS, recursive=False)
-
-            # Check for exact matches directly in the extracted directory
-            all_matched = True
-            for video_file in video_files:
-                video_stem = video_file.stem
-                matching_funscripts = [f for f in funscript_files if f.stem == video_stem]
-                matching_subtitles = [s for s in subtitle_files if s.stem == video_stem]
-
-                if matching_funscripts or matching_subtitles:
-                    # Move files directly to Already Same Name
-                    console.print(f"Found exact match for {video_file.name}")
-                    
-                    # Check if files already exist in destination
-                    if not (already_same_name_dir / video_file.name).exists():
-                        try:
-                            video_file.rename(already_same_name_dir / video_file.name)
-                        except Exception as e:
-                            console.print(f"[yellow]Could not move {video_file.name}: {str(e)}[/yellow]")
-                    else:
-                        console.print(f"[yellow]File already exists in destination: {video_file.name}[/yellow]")
+            # Process the extracted files immediately if extraction was successful
+            if extraction_successful and extract_dir.exists() and any(extract_dir.iterdir()):
+                # Collect all files from the extracted directory, including nested archives' subfolders
+                video_files = collect_files_with_extension(extract_dir, VIDEO_EXTENSIONS, recursive=True)
+                funscript_files = collect_files_with_extension(extract_dir, [".funscript"] + MULTI_AXIS_EXTENSIONS, recursive=True)
+                subtitle_files = collect_files_with_extension(extract_dir, SUBTITLE_EXTENSIONS, recursive=True)
+
+                # Check for exact matches directly in the extracted directory
+                all_matched = True
+                for video_file in video_files:
+                    video_stem = video_file.stem
+                    matching_funscripts = [f for f in funscript_files if f.stem == video_stem]
+                    matching_subtitles = [s for s in subtitle_files if s.stem == video_stem]
+
+                    if matching_funscripts or matching_subtitles:
+                        # Move files directly to Already Same Name
+                        console.print(f"Found exact match for {video_file.name}")
                     
-                    for funscript in matching_funscripts:
-                        if not (already_same_name_dir / funscript.name).exists():
+                        # Check if files already exist in destination
+                        if not (already_same_name_dir / video_file.name).exists():
                             try:
-                                funscript.rename(already_same_name_dir / funscript.name)
+                                move_no_clobber(video_file, already_same_name_dir / video_file.name)
                             except Exception as e:
-                                console.print(f"[yellow]Could not move {funscript.name}: {str(e)}[/yellow]")
+                                console.print(f"[yellow]Could not move {video_file.name}: {str(e)}[/yellow]")
                         else:
-                            console.print(f"[yellow]File already exists in destination: {funscript.name}[/yellow]")
+                            console.print(f"[yellow]File already exists in destination: {video_file.name}[/yellow]")
                     
-                    for subtitle in matching_subtitles:
-                        if not (already_same_name_dir / subtitle.name).exists():
+                        for funscript in matching_funscripts:
+                            if not (already_same_name_dir / funscript.name).exists():
+                                try:
+                                    move_no_clobber(funscript, already_same_name_dir / funscript.name)
+                                except Exception as e:
+                                    console.print(f"[yellow]Could not move {funscript.name}: {str(e)}[/yellow]")
+                            else:
+                                console.print(f"[yellow]File already exists in destination: {funscript.name}[/yellow]")
+                    
+                        for subtitle in matching_subtitles:
+                            if not (already_same_name_dir / subtitle.name).exists():
+                                try:
+                                    move_no_clobber(subtitle, already_same_name_dir / subtitle.name)
+                                except Exception as e:
+                                    console.print(f"[yellow]Could not move {subtitle.name}: {str(e)}[/yellow]")
+                            else:
+                                console.print(f"[yellow]File already exists in destination: {subtitle.name}[/yellow]")
+                    else:
+                        # Only move unmatched files to main directory
+                        all_matched = False
+                        if not (directory / video_file.name).exists():
                             try:
-                                subtitle.rename(already_same_name_dir / subtitle.name)
+                                move_no_clobber(video_file, directory / video_file.name)
                             except Exception as e:
-                                console.print(f"[yellow]Could not move {subtitle.name}: {str(e)}[/yellow]")
+                                console.print(f"[yellow]Could not move {video_file.name}: {str(e)}[/yellow]")
                         else:
-                            console.print(f"[yellow]File already exists in destination: {subtitle.name}[/yellow]")
-                else:
-                    # Only move unmatched files to main directory
-                    all_matched = False
-                    if not (directory / video_file.name).exists():
+                            console.print(f"[yellow]File already exists in destination: {video_file.name}[/yellow]")
+
+                # Move any remaining unmatched files to main directory
+                remaining_funscripts = [f for f in funscript_files if f.exists()]
+                remaining_subtitles = [s for s in subtitle_files if s.exists()]
+            
+                for file in remaining_funscripts + remaining_subtitles:
+                    if not (directory / file.name).exists():
                         try:
-                            video_file.rename(directory / video_file.name)
+                            move_no_clobber(file, directory / file.name)
                         except Exception as e:
-                            console.print(f"[yellow]Could not move {video_file.name}: {str(e)}[/yellow]")
+                            console.print(f"[yellow]Could not move {file.name}: {str(e)}[/yellow]")
                     else:
-                        console.print(f"[yellow]File already exists in destination: {video_file.name}[/yellow]")
+                        console.print(f"[yellow]File already exists in destination: {file.name}[/yellow]")
+                    all_matched = False
 
-            # Move any remaining unmatched files to main directory
-            remaining_funscripts = [f for f in funscript_files if f.exists()]
-            remaining_subtitles = [s for s in subtitle_files if s.exists()]
-            
-            for file in remaining_funscripts + remaining_subtitles:
-                if not (directory / file.name).exists():
+                if not lease.held():
+                    # Another instance took the archive over (this one stalled past LEASE_TIMEOUT), so it owns the cleanup
+                    console.print(f"[red]Lost the lease on {archive_path.name}; leaving it and {extract_dir.name} to the other instance[/red]")
+                    continue
+
+                # Files that could not be moved (name taken, failed move) only exist in the extraction directory
+                leftovers = [
+                    os.path.join(root, name)
+                    for root, _, filenames in os.walk(extract_dir)
+                    for name in filenames
+                    if name != EXTRACT_MANIFEST_NAME
+                ]
+                if leftovers:
+                    all_matched = False
+                    console.print(f"[yellow]{len(leftovers)} extracted files were not moved; keeping {extract_dir.name} and the archive.[/yellow]")
+                else:
+                    # Clean up extraction directory
                     try:
-                        file.rename(directory / file.name)
+                        if extract_dir.exists():
+                            import shutil
+                            shutil.rmtree(extract_dir)
                     except Exception as e:
-                        console.print(f"[yellow]Could not move {file.name}: {str(e)}[/yellow]")
-                else:
-                    console.print(f"[yellow]File already exists in destination: {file.name}[/yellow]")
-                all_matched = False
-
-            # Clean up extraction directory
-            try:
-                if extract_dir.exists():
-                    import shutil
-                    shutil.rmtree(extract_dir)
-            except Exception as e:
-                console.print(f"[red]Error cleaning up extraction directory: {str(e)}[/red]")
+                        console.print(f"[red]Error cleaning up extraction directory: {str(e)}[/red]")
 
-            if all_matched:
-                # Mark archive for deletion only if all files were matched
-                processed_archives.append(archive_path)
-                console.print(f"[green]All files matched and moved to Already Same Name.[/green]")
+                if all_matched:
+                    # Delete the archive (every volume of a set) only if all files were matched, before the next one needs the space
+                    console.print(f"[green]All files matched and moved to Already Same Name.[/green]")
+                    for volume in archive_set.volumes:
+                        try:
+                            volume.unlink()
+                            console.print(f"[green]Deleted processed archive: {volume.name}[/green]")
+                        except Exception as e:
+                            console.print(f"[red]Error deleting archive {volume.name}: {str(e)}[/red]")
+                else:
+                    # Unmatched files were moved into the library folder; report it (once) for another renaming pass
+                    if directory not in extracted_directories:
+                        extracted_directories.append(directory)
+                    console.print(f"[yellow]Some files need to be processed for renaming.[/yellow]")
             else:
-                # Add to extracted_directories only if some files need renaming
-                extracted_directories.append(directory)
-                console.print(f"[yellow]Some files need to be processed for renaming.[/yellow]")
-        else:
-            if extract_dir.exists() and not any(extract_dir.iterdir()):
-                try:
-                    extract_dir.rmdir()
-                except Exception as e:
-                    console.print(f"[red]Error removing empty extraction directory: {str(e)}[/red]")
-
-    # Delete processed archives
-    for archive_path in processed_archives:
-        try:
-            archive_path.unlink()
-            console.print(f"[green]Deleted processed archive: {archive_path.name}[/green]")
-        except Exception as e:
-            console.print(f"[red]Error deleting archive {archive_path.name}: {str(e)}[/red]")
+                if extract_dir.exists() and not any(extract_dir.iterdir()):
+                    try:
+                        extract_dir.rmdir()
+                    except Exception as e:
+                        console.print(f"[red]Error removing empty extraction directory: {str(e)}[/red]")
+        finally:
+            lease.release()
 
     return extracted_directories
 
@@ -568,30 +2053,211 @@ def refine_buzzwords(reference_files):
             for line in file:
                 words = line.strip().split()
                 for word in words:
-                    if word.lower() not in BUZZWORDS:
-                        additional_buzzwords.add(word.lower())
+                    if word.casefold() not in BUZZWORDS:
+                        additional_buzzwords.add(word.casefold())
     BUZZWORDS = list(set(BUZZWORDS + list(additional_buzzwords)))
 
-def fuzzy_match(target, choices, threshold=FUZZ_THRESHOLD):
-    """Find the best fuzzy match for a target string from a list of choices."""
-    matches = process.extract(target, choices, scorer=fuzz.ratio, limit=3)
-    return [match for match, score, _ in matches if score >= threshold]
+def load_reference_indexes(reference_files=REFERENCE_FILES):
+    """Load the reference names and refine BUZZWORDS once. Returns the reference names (empty when missing)."""
+    try:
+        reference_names = load_reference_names(reference_files)
+        refine_buzzwords(reference_files)
+    except Exception as e:
+        console.print(f"[yellow]Warning: Could not load reference files: {str(e)}[/yellow]")
+        reference_names = set()
+    return reference_names
+
+class FuzzyCascade:
+    """
+    Multi-stage fuzzy matcher over a fixed list of choices. The first stage scores
+    every choice with a cheap scorer and a score cutoff so rapidfuzz can stop early;
+    each later stage rescores only the survivors of the previous one. Names are
+    compared in their normalized form (lowercase words, brackets and resolution
+    tags removed), which is computed once per choice. Per-stage timings and hit
+    rates are collected in stats. Discarded choices are skipped by every later lookup.
+    """
+
+    def __init__(self, choices, stages=None):
+        self.choices = list(choices)
+        self.processed = [normalize_name(choice).match for choice in self.choices]
+        self.positions = defaultdict(list)
+        for index, choice in enumerate(self.choices):
+            self.positions[choice].append(index)
+        self.remaining = len(self.choices)
+        self.stages = [(name, getattr(fuzz, name), cutoff, limit) for name, cutoff, limit in (stages or FUZZY_CASCADE)]
+        self.stats = [
+            {"scorer": name, "calls": 0, "candidates": 0, "survivors": 0, "seconds": 0.0}
+            for name, _, _, _ in self.stages
+        ]
+
+    def match_with_scores(self, target, indices=None):
+        """Return [(choice, score)] that survived every stage, best first. indices limits the choices scored."""
+        query = normalize_name(target).match
+        if indices is None:
+            # Discarded choices are None, which rapidfuzz skips
+            pool, pool_size = self.processed, self.remaining
+        else:
+            pool = {index: self.processed[index] for index in indices if self.processed[index] is not None}
+            pool_size = len(pool)
+        candidates = None
+        for (name, scorer, cutoff, limit), stats in zip(self.stages, self.stats):
+            start = time.perf_counter()
+            if candidates is None:
+                results = process.extract(query, pool, scorer=scorer, processor=None,
+                                          score_cutoff=cutoff, limit=limit)
+                scored = [(index, score) for _, score, index in results]
+                stats["candidates"] += pool_size
+            else:
+                scored = [(index, scorer(query, self.processed[index], score_cutoff=cutoff)) for index, _ in candidates]
+                scored = sorted((item for item in scored if item[1] >= cutoff), key=lambda item: item[1], reverse=True)[:limit]
+                stats["candidates"] += len(candidates)
+            stats["calls"] += 1
+            stats["survivors"] += len(scored)
+            stats["seconds"] += time.perf_counter() - start
+            candidates = scored
+            if not candidates:
+                break
+        return [(self.choices[index], score) for index, score in candidates]
+
+    def match(self, target):
+        """Return the choices that survived every stage, best first."""
+        return [choice for choice, _ in self.match_with_scores(target)]
 
-def is_exact_match(name1, name2, debug=False):
+    def discard(self, choice):
+        """Take every occurrence of a choice out of the pool."""
+        for index in self.positions.pop(choice, ()):
+            self.processed[index] = None
+            self.remaining -= 1
+
+class LocalityMatcher:
     """
-    Determines if two filenames are exactly matching before their extensions.
-    Returns True only if the filenames are identical (case-insensitive).
+    Fuzzy matching in tiers of directory locality. A video is matched against the
+    scripts in its own folder first, then against those in its parent, sibling and
+    sub folders, and only when neither tier has a match against the whole library.
+    Each tier is a small FuzzyCascade lookup instead of one over every script, and
+    related folders win over look-alike names elsewhere. Stems claimed by an
+    approved pair leave the pool. tier_stats counts the videos resolved per tier.
+
+    Before any scoring, a scene identifier of a SCENE_ID_PAIRING_KINDS type (see scene_ids)
+    that the video shares with exactly one stem, and with no other of target_names (the
+    videos), settles the pair; fuzzy candidates whose identifiers conflict with the video's
+    are dropped. id_stats counts both.
     """
-    # Remove extensions and convert to lowercase
-    base1 = Path(name1).stem.lower()
-    base2 = Path(name2).stem.lower()
-    
-    # Only print debug information if debug is True
-    if debug:
-        console.print(f"Comparing: '{base1}' with '{base2}'")
-    
-    # Check if names are identical after lowercase conversion
-    return base1 == base2
+    TIERS = ("same folder", "nearby folders", "whole library")
+
+    def __init__(self, choices, directories, stages=None, target_names=()):
+        self.cascade = FuzzyCascade(choices, stages)
+        self.stats = self.cascade.stats
+        self.tier_stats = dict.fromkeys(self.TIERS + ("no match",), 0)
+        self.id_stats = {"resolved": 0, "vetoed": 0}
+        self.stems_by_id = defaultdict(set)
+        for choice in dict.fromkeys(choices):
+            for scene_id in scene_ids(choice):
+                self.stems_by_id[scene_id].add(choice)
+        self.target_id_counts = defaultdict(int)
+        for name in dict.fromkeys(target_names):
+            for scene_id in scene_ids(name):
+                self.target_id_counts[scene_id] += 1
+        self.by_directory = defaultdict(list)
+        for index, directory in enumerate(directories):
+            self.by_directory[directory].append(index)
+        self.children = defaultdict(set)
+        for directory in self.by_directory:
+            self.children[os.path.dirname(directory)].add(directory)
+
+    def tiers(self, directory):
+        """Choice indices per tier for a video in directory; None stands for the whole pool."""
+        parent = os.path.dirname(directory)
+        nearby = ({parent} | self.children.get(parent, set()) | self.children.get(directory, set())) - {directory}
+        return [
+            self.by_directory.get(directory, []),
+            [index for folder in nearby for index in self.by_directory.get(folder, ())],
+            None,
+        ]
+
+    def resolve_by_id(self, ids):
+        """The one unclaimed stem that shares a unique identifier with the video, or None."""
+        resolved = set()
+        for scene_id in ids:
+            if scene_id[0] not in SCENE_ID_PAIRING_KINDS:
+                continue  # Generic numbering like "Part 1" only vetoes
+            if self.target_id_counts[scene_id] > 1:
+                continue  # Several videos carry it
+            stems = [stem for stem in self.stems_by_id.get(scene_id, ()) if stem in self.cascade.positions]
+            if len(stems) == 1:
+                resolved.add(stems[0])
+        if len(resolved) == 1:
+            stem = resolved.pop()
+            if not ids_conflict(ids, scene_ids(stem)):
+                return stem
+        return None
+
+    def veto(self, ids, matches):
+        """Drop fuzzy matches whose identifiers conflict with the video's."""
+        if not ids:
+            return matches
+        kept = [(stem, score) for stem, score in matches if not ids_conflict(ids, scene_ids(stem))]
+        self.id_stats["vetoed"] += len(matches) - len(kept)
+        return kept
+
+    def match_with_scores(self, target, directory=None):
+        """Return [(choice, score)] from a shared identifier or else the closest tier with a match, best first."""
+        ids = scene_ids(target)
+        stem = self.resolve_by_id(ids) if ids else None
+        if stem is not None:
+            self.id_stats["resolved"] += 1
+            return [(stem, 100.0)]
+        if directory is None:
+            return self.veto(ids, self.cascade.match_with_scores(target))
+        for tier, indices in zip(self.TIERS, self.tiers(directory)):
+            if indices is not None and not indices:
+                continue
+            matches = self.veto(ids, self.cascade.match_with_scores(target, indices))
+            if matches:
+                self.tier_stats[tier] += 1
+                return matches
+        self.tier_stats["no match"] += 1
+        return []
+
+    def match(self, target, directory=None):
+        """Return the choices from the closest tier with a match, best first."""
+        return [choice for choice, _ in self.match_with_scores(target, directory)]
+
+    def claim(self, stems):
+        """Remove stems that now belong to an approved pair from every tier."""
+        for stem in stems:
+            self.cascade.discard(stem)
+
+def print_tier_stats(tier_stats):
+    """Print how many videos were matched in each LocalityMatcher tier."""
+    if not tier_stats or not any(tier_stats.values()):
+        return
+    console.print("[cyan]Matched by folder: " + ", ".join(f"{tier}: {count}" for tier, count in tier_stats.items()) + "[/cyan]")
+
+def print_id_stats(id_stats):
+    """Print how many pairs the scene identifier fast path settled and how many fuzzy candidates it vetoed."""
+    if not id_stats or not any(id_stats.values()):
+        return
+    console.print(
+        f"[cyan]Scene IDs: {id_stats['resolved']} pairs settled by a unique shared identifier, "
+        f"{id_stats['vetoed']} fuzzy candidates vetoed by conflicting identifiers.[/cyan]"
+    )
+
+def print_stage_stats(stage_stats):
+    """Print the per-stage timings and hit rates of a FuzzyCascade."""
+    if not any(stats["calls"] for stats in stage_stats):
+        return
+    console.print("\n[cyan]════════ Fuzzy Matching Stages ════════[/cyan]")
+    for stats in stage_stats:
+        hit_rate = 100 * stats["survivors"] / stats["candidates"] if stats["candidates"] else 0
+        console.print(
+            f"  {stats['scorer']}: {stats['candidates']} candidates -> {stats['survivors']} survivors "
+            f"({hit_rate:.1f}%) in {stats['seconds']:.3f}s over {stats['calls']} lookups"
+        )
+
+def exact_match_key(name):
+    """Return the key under which two names count as an exact match."""
+    return normalize_name(Path(name).stem).key
 
 def typewriter_print(text, delay=0.03, style=None):
     """Enhanced typewriter effect with optional styling."""
@@ -623,172 +2289,1135 @@ def typewriter_print(text, delay=0.03, style=None):
         time.sleep(delay)
     console.print()  # New line at the end
 
-def move_exact_matches(video_files, funscript_files, subtitle_files, already_same_name_dir, dry_run=False, show_progress=True):
-    """Move files with exact matching base names to Already Same Name directory."""
-    video_map = {f.stem: f for f in video_files}
-    funscript_map = {f.stem: f for f in funscript_files}
-    subtitle_map = {f.stem: f for f in subtitle_files}
+class ExactMatchJoin:
+    """
+    Incremental exact matcher. Videos, funscripts and subtitles are added as they are
+    scanned, and a match set is emitted as soon as a video meets a funscript or
+    subtitle with the same key. Files that arrive later for an already matched key
+    are emitted on their own so they join their set in 'Already Same Name'.
+    """
+    LABELS = {"video": "Video", "funscript": "Funscript", "subtitle": "Subtitle"}
+    ORDER = {"Video": 0, "Funscript": 1, "Subtitle": 2}
+
+    def __init__(self):
+        self.pending = {}  # key -> [(record, label)] not matched yet
+        self.matched_keys = set()
+        self.set_count = 0
+
+    def add(self, records):
+        """Add (kind, record) pairs and return the match sets they complete."""
+        completed = []
+        for kind, record in records:
+            label = self.LABELS[kind]
+            key = exact_match_key(record.stem)
+            if key in self.matched_keys:
+                completed.append([(record, label)])
+                continue
+            group = self.pending.setdefault(key, [])
+            group.append((record, label))
+            labels = {l for _, l in group}
+            if "Video" in labels and len(labels) > 1:
+                del self.pending[key]
+                self.matched_keys.add(key)
+                self.set_count += 1
+                completed.append(sorted(group, key=lambda item: self.ORDER[item[1]]))
+        return completed
+
+    def remaining(self):
+        """Return the unmatched (videos, funscripts, subtitles), one file per stem."""
+        remaining = {"Video": {}, "Funscript": {}, "Subtitle": {}}
+        for group in self.pending.values():
+            for record, label in group:
+                remaining[label][record.stem] = record
+        return (list(remaining["Video"].values()),
+                list(remaining["Funscript"].values()),
+                list(remaining["Subtitle"].values()))
+
+class SortMergeExactJoin:
+    """
+    Exact matcher for libraries larger than memory, with the ExactMatchJoin interface.
+    Scanned records are buffered up to EXTERNAL_SORT_RUN_SIZE, sorted by exact-match
+    key and written to a run file on disk. finish() merges all runs in one sequential
+    pass and yields a match set per key that has a video plus a funscript or subtitle,
+    so only the files of one key (and one line per run) are in memory at a time. Axis
+    scripts share the key of their main script, as exact_match_key drops the axis part.
+    Match sets only come out of finish(), after the scan is complete. The run folder is
+    created with the first run and removed by finish() or close().
+    """
+    LABELS = ("Video", "Funscript", "Subtitle")
+    ORDER = {"video": 0, "funscript": 1, "subtitle": 2}
+
+    def __init__(self, run_size=EXTERNAL_SORT_RUN_SIZE, temp_dir=EXTERNAL_SORT_DIR):
+        self.run_size = run_size
+        self.temp_dir = temp_dir
+        self.directory = None
+        self.buffer = []
+        self.runs = []
+        self.set_count = 0
+        self.unmatched = ([], [], [])  # Videos, funscripts, subtitles, one file per stem
+
+    @staticmethod
+    def sort_key(row):
+        return row[0], row[1]
+
+    def add(self, records):
+        """Buffer (kind, record) pairs, spilling a sorted run to disk whenever the buffer is full."""
+        for kind, record in records:
+            self.buffer.append((exact_match_key(record.stem), self.ORDER[kind], record.parent, record.stem,
+                                record.suffix_code, record.size, record.mtime))
+            if len(self.buffer) >= self.run_size:
+                self.write_run()
+        return []
 
-    if not show_progress:
-        # Silent mode - just move files without any display
-        moved_files = set()
-        remaining_videos = []
-        remaining_funscripts = []
-        remaining_subtitles = []
-        matching_sets = []
-
-        # Find matching sets silently
-        for video_base, video_path in list(video_map.items()):
-            matched_files = [(video_path, "Video")]
-            matching_funscripts = [f for f_stem, f in funscript_map.items() 
-                                 if is_exact_match(video_base, f_stem, debug=False)]
-            matching_subtitles = [s for s_stem, s in subtitle_map.items() 
-                                if is_exact_match(video_base, s_stem, debug=False)]
-            
-            if matching_funscripts or matching_subtitles:
-                matched_files.extend((f, "Funscript") for f in matching_funscripts)
-                matched_files.extend((s, "Subtitle") for s in matching_subtitles)
-                matching_sets.append(matched_files)
-            else:
-                remaining_videos.append(video_path)
+    def write_run(self):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="funforge-runs-", dir=self.temp_dir)
+        self.buffer.sort(key=self.sort_key)
+        path = os.path.join(self.directory, f"run-{len(self.runs):06d}.jsonl")
+        with open(path, 'w', encoding='utf-8', buffering=EXTRACT_BUFFER_SIZE) as file:
+            for row in self.buffer:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def read_run(path):
+        with open(path, 'r', encoding='utf-8', buffering=EXTRACT_BUFFER_SIZE) as file:
+            for line in file:
+                yield json.loads(line)
 
-        # Move files silently
-        if matching_sets and not dry_run:
-            for matched_set in matching_sets:
-                for file_path, _ in matched_set:
-                    if file_path not in moved_files and file_path.exists():
-                        try:
-                            file_path.rename(already_same_name_dir / file_path.name)
-                            moved_files.add(file_path)
-                        except Exception as e:
-                            console.print(f"[red]Error moving {file_path.name}: {str(e)}[/red]")
+    def finish(self):
+        """Merge-join the runs and yield the match sets in key order; the rest is kept for remaining()."""
+        try:
+            self.buffer.sort(key=self.sort_key)
+            streams = [self.read_run(path) for path in self.runs] + [iter(self.buffer)]
+            merged = heapq.merge(*streams, key=self.sort_key)
+            for _, rows in groupby(merged, key=lambda row: row[0]):
+                group = [(order, FileRecord(sys.intern(parent), stem, code, size, mtime))
+                         for _, order, parent, stem, code, size, mtime in rows]
+                orders = {order for order, _ in group}
+                if 0 in orders and len(orders) > 1:
+                    self.set_count += 1
+                    yield [(record, self.LABELS[order]) for order, record in group]
+                    continue
+                for order in orders:
+                    self.unmatched[order].extend({record.stem: record for o, record in group if o == order}.values())
+        finally:
+            self.close()
+
+    def close(self):
+        """Drop the buffer and delete the run files; safe to call more than once."""
+        self.buffer = []
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def remaining(self):
+        """Return the unmatched (videos, funscripts, subtitles), one file per stem."""
+        return self.unmatched
+
+def lease_owner():
+    """Identifies this instance in lease files: host name and process id."""
+    return f"{platform.node()}:{os.getpid()}"
+
+def read_lease(path):
+    """Return the contents of a lease file as a dict, or None if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
 
-        # Handle remaining files and return
-        matched_funscripts = {f for matched_set in matching_sets for f, ftype in matched_set if ftype == "Funscript"}
-        matched_subtitles = {s for matched_set in matching_sets for s, ftype in matched_set if ftype == "Subtitle"}
-        
-        remaining_funscripts.extend([f for f_stem, f in funscript_map.items() 
-                                   if f not in matched_funscripts and f.exists()])
-        remaining_subtitles.extend([s for s_stem, s in subtitle_map.items() 
-                                   if s not in matched_subtitles and s.exists()])
+def lease_age(path):
+    """Seconds since a lease file was last touched, or None if it does not exist."""
+    try:
+        return time.time() - os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def foreign_lease(path):
+    """Return the owner of a live lease at path held by another instance, else None."""
+    age = lease_age(path)
+    if age is None or age > LEASE_TIMEOUT:
+        return None
+    lease = read_lease(path)
+    owner = lease.get("owner", "another instance") if isinstance(lease, dict) else "another instance"
+    return None if owner == lease_owner() else owner
+
+class Lease:
+    """
+    Lock file that gives one FunForge instance (on any machine sharing the library) a
+    folder or an archive. The file is created with O_EXCL, names its owner and is
+    touched every LEASE_HEARTBEAT seconds by a background thread. A lease that has
+    not been touched for LEASE_TIMEOUT seconds belongs to an instance that died and
+    is taken over; takeovers go through a second O_EXCL file, so two instances never
+    both take over the same stale lease. Staleness is judged by file times, so the
+    machines' clocks must agree to well within LEASE_TIMEOUT.
+    """
 
-        return remaining_videos, remaining_funscripts, remaining_subtitles
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.owner = lease_owner()
+        self.stopped = threading.Event()
+        self.thread = None
 
-    else:
-        # Progress mode - show detailed progress
-        remaining_videos = []
-        remaining_funscripts = []
-        remaining_subtitles = []
-        moved_files = set()
-        matching_sets = []
-        
-        # Find matching sets
-        for video_base, video_path in list(video_map.items()):
-            matched_files = [(video_path, "Video")]
-            matching_funscripts = [f for f_stem, f in funscript_map.items() 
-                                 if is_exact_match(video_base, f_stem, debug=True)]
-            matching_subtitles = [s for s_stem, s in subtitle_map.items() 
-                                if is_exact_match(video_base, s_stem, debug=True)]
-            
-            if matching_funscripts or matching_subtitles:
-                matched_files.extend((f, "Funscript") for f in matching_funscripts)
-                matched_files.extend((s, "Subtitle") for s in matching_subtitles)
-                matching_sets.append(matched_files)
-            else:
-                remaining_videos.append(video_path)
+    def create(self):
+        try:
+            descriptor = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump({"owner": self.owner, "acquired": time.time()}, file)
+        return True
 
-        if matching_sets:
-            console.print("\n[cyan]════════ Moving Exact Matches ════════[/cyan]")
-            
-            with Progress(
-                SpinnerColumn(),
-                "[progress.description]{task.description}",
-                BarColumn(),
-                TaskProgressColumn(),
-                TimeElapsedColumn(),
-                transient=False
-            ) as progress:
-                move_task = progress.add_task("Moving matched files...", total=len(matching_sets))
-                
-                for matched_set in matching_sets:
-                    files_str = " + ".join(f"[{ftype}] {f.name}" for f, ftype in matched_set)
-                    progress.update(move_task, description=f"Moving: {files_str}")
-                    
-                    if not dry_run:
-                        for file_path, file_type in matched_set:
-                            if file_path not in moved_files and file_path.exists():
-                                try:
-                                    file_path.rename(already_same_name_dir / file_path.name)
-                                    moved_files.add(file_path)
-                                except Exception as e:
-                                    console.print(f"\n[red]Error moving {file_path.name}: {str(e)}[/red]")
-                    
-                    progress.advance(move_task)
-                    time.sleep(MOVE_DELAY)
+    def take_over(self):
+        """Replace a stale lease with ours. Returns False if it is live or another instance is taking it over."""
+        takeover_path = self.path + ".takeover"
+        try:
+            os.close(os.open(takeover_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        except FileExistsError:
+            age = lease_age(takeover_path)
+            if age is not None and age > LEASE_TIMEOUT:
+                # Left behind by an instance that died while taking over
+                try:
+                    os.remove(takeover_path)
+                except OSError:
+                    pass
+            return False
+        try:
+            age = lease_age(self.path)
+            if age is not None and age <= LEASE_TIMEOUT:
+                return False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            return self.create()
+        finally:
+            try:
+                os.remove(takeover_path)
+            except OSError:
+                pass
 
-            # Summary after moving files
-            if not dry_run:
-                console.print(f"\n[green]✓ Moved {len(matching_sets)} sets of matching files to 'Already Same Name'[/green]")
-            else:
-                console.print(f"\n[yellow]DRY RUN: Would move {len(matching_sets)} sets of matching files[/yellow]")
+    def acquire(self):
+        """Take the lease and start its heartbeat. Returns False while another instance holds it."""
+        if not self.create() and not self.take_over():
+            return False
+        self.thread = threading.Thread(target=self.heartbeat, daemon=True)
+        self.thread.start()
+        return True
+
+    def heartbeat(self):
+        while not self.stopped.wait(LEASE_HEARTBEAT):
+            if not self.held():
+                return
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    def held(self):
+        """True while the lease file still names this instance (it was not taken over)."""
+        lease = read_lease(self.path)
+        return isinstance(lease, dict) and lease.get("owner") == self.owner
+
+    def holder(self):
+        lease = read_lease(self.path)
+        return lease.get("owner", "another instance") if isinstance(lease, dict) else "another instance"
+
+    def release(self):
+        """Stop the heartbeat and remove the lease file if it is still ours."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        if self.held():
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
 
-        # Handle remaining files
-        matched_funscripts = {f for matched_set in matching_sets for f, ftype in matched_set if ftype == "Funscript"}
-        matched_subtitles = {s for matched_set in matching_sets for s, ftype in matched_set if ftype == "Subtitle"}
-        
-        remaining_funscripts.extend([f for f_stem, f in funscript_map.items() 
-                                   if f not in matched_funscripts and f.exists()])
-        remaining_subtitles.extend([s for s_stem, s in subtitle_map.items() 
-                                   if s not in matched_subtitles and s.exists()])
+def acquire_library_lease(directory):
+    """
+    Lease a library folder for organizing. Fails (returns (None, holder)) when another
+    instance holds this folder or one above it; subfolders leased by other instances are
+    skipped by the scan instead. Returns (lease, None) on success.
+    """
+    lease = Lease(Path(directory) / LEASE_FILE_NAME)
+    if not lease.acquire():
+        return None, lease.holder()
+    for parent in Path(os.path.abspath(directory)).parents:
+        owner = foreign_lease(parent / LEASE_FILE_NAME)
+        if owner:
+            lease.release()
+            return None, f"{owner} (on {parent})"
+    return lease, None
+
+def move_no_clobber(source, target):
+    """
+    Move a file to target, raising FileExistsError when target exists, atomically even
+    when other instances move files into the same folder. On POSIX the target is created
+    as a hardlink (which fails if the name is taken) and the source name removed; where
+    hardlinks are not supported the name is claimed with O_EXCL and then replaced.
+    Windows renames never replace an existing file.
+    """
+    if os.name == 'nt':
+        os.rename(source, target)
+        return
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno not in (errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EMLINK):
+            raise
+        os.close(os.open(target, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        try:
+            os.replace(source, target)
+        except OSError:
+            os.remove(target)
+            raise
+        return
+    os.unlink(source)
+
+def reflink_file(source, target):
+    """Clone source to a new target file that shares its data blocks (btrfs, XFS, APFS-style CoW)."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform", os.fspath(target))
+    with open(source, 'rb') as src, open(target, 'xb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(target)
+            raise
+    shutil.copystat(source, target)
+
+def organize_file(source, target, link_files=False):
+    """
+    Put a file at its FunForge destination. By default it is moved. With link_files
+    the original stays where it is (so it keeps seeding) and the target becomes a
+    hardlink, or a reflink when hardlinks are not possible, and a full copy only as
+    a last resort. An existing target is never replaced (FileExistsError), even when
+    another instance creates it at the same moment.
+    Returns the method used: "move", "hardlink", "reflink" or "copy".
+    """
+    if not link_files:
+        move_no_clobber(source, target)
+        return "move"
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError as e:
+        if e.errno == errno.EEXIST:
+            raise
+    try:
+        reflink_file(source, target)
+        return "reflink"
+    except OSError as e:
+        if e.errno == errno.EEXIST:
+            raise
+    with open(source, 'rb') as src, open(target, 'xb') as dst:
+        shutil.copyfileobj(src, dst, IO_PROFILE.chunk_size)
+    shutil.copystat(source, target)
+    return "copy"
+
+def print_link_summary(method_counts):
+    """Print how linked files were placed, warning when some had to be copied."""
+    linked = {method: count for method, count in method_counts.items() if method != "move" and count}
+    if not linked:
+        return
+    console.print(f"[cyan]Linked files: {', '.join(f'{count} {method}' for method, count in linked.items())}[/cyan]")
+    if linked.get("copy"):
+        console.print(f"[yellow]{linked['copy']} files could not be linked and were copied (different drive or filesystem?)[/yellow]")
+
+def execute_exact_moves(matching_sets, already_same_name_dir, dry_run=False, show_progress=True, link_files=False):
+    """Move (or link) exact match sets to 'Already Same Name' as they arrive. Returns the number of sets handled."""
+    moved_files = set()
+    method_counts = defaultdict(int)
+    set_count = 0
+    progress = None
+    move_task = None
+    try:
+        for matched_set in matching_sets:
+            if len(matched_set) > 1:
+                set_count += 1
+            if show_progress:
+                if progress is None:
+                    console.print("\n[cyan]════════ Moving Exact Matches ════════[/cyan]")
+                    progress = Progress(
+                        SpinnerColumn(),
+                        "[progress.description]{task.description}",
+                        BarColumn(),
+                        TaskProgressColumn(),
+                        TimeElapsedColumn(),
+                        transient=False
+                    )
+                    progress.start()
+                    total = len(matching_sets) if isinstance(matching_sets, list) else None
+                    move_task = progress.add_task("Moving matched files...", total=total)
+                files_str = " + ".join(f"[{ftype}] {f.name}" for f, ftype in matched_set)
+                progress.update(move_task, description=f"Moving: {files_str}")
 
-        return remaining_videos, remaining_funscripts, remaining_subtitles
+            if not dry_run:
+                for file_path, _ in matched_set:
+                    if file_path in moved_files or not file_path.exists():
+                        continue
+                    target = already_same_name_dir / file_path.name
+                    if target.exists():
+                        console.print(f"[yellow]File already exists in destination: {file_path.name}[/yellow]")
+                        continue
+                    try:
+                        method_counts[organize_file(file_path, target, link_files)] += 1
+                        moved_files.add(file_path)
+                    except FileExistsError:
+                        console.print(f"[yellow]File already exists in destination: {file_path.name}[/yellow]")
+                    except Exception as e:
+                        console.print(f"\n[red]Error moving {file_path.name}: {str(e)}[/red]")
+
+            if show_progress:
+                progress.advance(move_task)
+                time.sleep(MOVE_DELAY)
+    finally:
+        if progress is not None:
+            progress.stop()
+
+    # Summary after moving files
+    if show_progress and set_count:
+        if not dry_run:
+            console.print(f"\n[green]✓ {'Linked' if link_files else 'Moved'} {set_count} sets of matching files to 'Already Same Name'[/green]")
+            print_link_summary(method_counts)
+        else:
+            console.print(f"\n[yellow]DRY RUN: Would move {set_count} sets of matching files[/yellow]")
+    return set_count
 
-def choose_better_name(name1, name2, prefer_funscript=False):
-    """Choose the more descriptive and informative name."""
-    name1_cleaned = clean_name(name1)
-    name2_cleaned = clean_name(name2)
+def start_stage(items, output_queue):
+    """Run a generator stage in a background thread, feeding a bounded queue."""
+    def run():
+        try:
+            for item in items:
+                output_queue.put(item)
+        except BaseException as e:
+            output_queue.put(StageError(e))
+        finally:
+            output_queue.put(_STAGE_END)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def drain_stage(input_queue):
+    """Yield the items of a stage queue until the producing stage finishes."""
+    while True:
+        item = input_queue.get()
+        if item is _STAGE_END:
+            return
+        if isinstance(item, StageError):
+            raise item.error
+        yield item
+
+def stream_exact_matches(directory, recursive, already_same_name_dir, dry_run=False, show_progress=True, link_files=False,
+                         low_memory=LOW_MEMORY_EXACT_MATCHING):
+    """
+    Scan, classify and exact-match as a pipeline: a walker thread lists directories,
+    a matcher thread classifies each directory and joins exact matches, and the
+    calling thread moves every match set as soon as it is found, while the walk
+    continues. With low_memory the matcher spills sorted runs to disk instead
+    (SortMergeExactJoin) and the match sets follow the walk in one merge pass.
+    Returns (videos, funscripts, subtitles, archives, counts) left for
+    fuzzy matching, where counts has the number of scanned files per kind.
+    """
+    directory_queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    match_queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    join = SortMergeExactJoin() if low_memory else ExactMatchJoin()
+    archive_files = []
+    counts = defaultdict(int)
+    multi_axis_extensions = tuple(ext.lower() for ext in MULTI_AXIS_EXTENSIONS)
+
+    def match_directories():
+        try:
+            for parent, entries in drain_stage(directory_queue):
+                records = []
+                for kind, record in classify_entries(parent, entries):
+                    counts[kind] += 1
+                    if kind == "archive":
+                        archive_files.append(record)
+                        continue
+                    if kind == "funscript" and record.name.lower().endswith(multi_axis_extensions):
+                        counts["multi_axis"] += 1
+                    records.append((kind, record))
+                yield from join.add(records)
+            if low_memory:
+                yield from join.finish()
+        finally:
+            # A failed walk never reaches finish(), so the spilled runs are removed here
+            if low_memory:
+                join.close()
+
+    start_stage(walk_directories(directory, recursive), directory_queue)
+    start_stage(match_directories(), match_queue)
+    execute_exact_moves(drain_stage(match_queue), already_same_name_dir, dry_run, show_progress, link_files)
+
+    video_files, funscript_files, subtitle_files = join.remaining()
+    return video_files, funscript_files, subtitle_files, archive_files, counts
+
+# stems_by_key maps the normalized key of every candidate stem back to the stems themselves
+MatchIndex = namedtuple("MatchIndex", ["funscript_map", "subtitle_map", "multi_axis_dict", "all_stems", "matcher", "stems_by_key"])
+
+# moves lists every (old path, new path) of the pair: video first, then funscripts, then subtitles
+# script_stem is the matched stem of the pair's main script (or subtitle), script_path its file
+PairProposal = namedtuple("PairProposal", [
+    "video_path", "normal_funscript_path", "funscript_paths", "multi_axis_types", "subtitle_paths",
+    "better_name", "comparison_details", "new_video_name", "new_funscript_names", "new_subtitle_names", "moves",
+    "script_stem", "script_path",
+])
+
+def build_match_index(funscript_files, subtitle_files, video_files=()):
+    """
+    Index the funscripts and subtitles left after exact matching for fuzzy matching.
+    video_files are the videos to be matched, which tells the matcher which scene identifiers are unique.
+    """
+    funscript_map = {f.stem: f for f in funscript_files}
+    subtitle_map = {s.stem: s for s in subtitle_files}
+
+    funscript_stems = []
+    stem_directories = []  # Folder of each funscript stem, for locality-first matching
+    multi_axis_dict = {}  # Keep track of multi-axis files by their base name
+
+    # First collect all funscript base names (once, not per video)
+    for f in funscript_files:
+        is_multi_axis = False
+        for ext in MULTI_AXIS_EXTENSIONS:
+            if f.name.endswith(ext):
+                is_multi_axis = True
+                base_name = f.name[:-len(ext)]
+                axis_type = ext.split('.')[1]
+                if base_name not in multi_axis_dict:
+                    multi_axis_dict[base_name] = []
+                multi_axis_dict[base_name].append((f, axis_type))
+                break
 
-    name1_buzzwords = contains_buzzwords(name1)
-    name2_buzzwords = contains_buzzwords(name2)
+        if not is_multi_axis:
+            funscript_stems.append(f.stem)
+            stem_directories.append(os.path.dirname(os.fspath(f)))
+
+    # Add base names for multi-axis files
+    funscript_stems.extend(multi_axis_dict.keys())
+    stem_directories.extend(os.path.dirname(os.fspath(files[0][0])) for files in multi_axis_dict.values())
+
+    subtitle_stems = [s.stem for s in subtitle_files]
+    stem_directories.extend(os.path.dirname(os.fspath(s)) for s in subtitle_files)
+    all_stems = funscript_stems + subtitle_stems
+    stems_by_key = defaultdict(list)
+    for stem in dict.fromkeys(all_stems):
+        stems_by_key[normalize_name(stem).key].append(stem)
+    matcher = LocalityMatcher(all_stems, stem_directories, target_names=[v.stem for v in video_files])
+    return MatchIndex(funscript_map, subtitle_map, multi_axis_dict, all_stems, matcher, stems_by_key)
+
+def proposal_stems(proposal):
+    """The index stems a PairProposal uses: its funscript, axis base names and subtitle stems."""
+    stems = {proposal.normal_funscript_path.stem} if proposal.normal_funscript_path else set()
+    stems.update(f.name[:-len(f".{axis}.funscript")] for f, axis in zip(proposal.funscript_paths, proposal.multi_axis_types))
+    stems.update(s.stem for s in proposal.subtitle_paths)
+    return stems
+
+def match_primary_file(index, stem):
+    """Return the file a matched stem stands for: normal funscript, else first axis script, else subtitle."""
+    if stem in index.funscript_map:
+        return index.funscript_map[stem]
+    if stem in index.multi_axis_dict:
+        return index.multi_axis_dict[stem][0][0]
+    return index.subtitle_map.get(stem)
+
+def propose_pair(video_base, video_path, index, changed_dir, tag_with_resolution, best_matches=None):
+    """
+    Fuzzy match a video against the index and work out the new names for the pair.
+    Pass best_matches to skip fuzzy scoring (e.g. for a remembered decision).
+    Returns (best_matches, proposal); proposal is None when nothing matched.
+    """
+    if best_matches is None:
+        best_matches = index.matcher.match(video_base, os.path.dirname(os.fspath(video_path)))
+    if not best_matches:
+        return best_matches, None
+
+    funscript_paths = []
+    multi_axis_types = []
+    normal_funscript_path = None
+    normal_funscript_stem = None
+    axis_stem = None
+    seen_paths = set()  # Track which paths we've already added
+    seen_subtitle_stems = set()  # Initialize the set for tracking subtitle stems
+    seen_funscript_stems = set()  # Initialize the set for tracking funscript stems
+
+    for match in best_matches:
+        # Check for normal funscript (matches come best first, so keep the first one)
+        if match in index.funscript_map and normal_funscript_path is None:
+            normal_funscript_path = index.funscript_map[match]
+            normal_funscript_stem = match
+            seen_paths.add(normal_funscript_path)
+            seen_funscript_stems.add(match)
+
+        # Check for multi-axis funscripts
+        if match in index.multi_axis_dict:
+            for f, axis_type in index.multi_axis_dict[match]:
+                if f not in seen_paths:  # Only add if we haven't seen this path before
+                    funscript_paths.append(f)
+                    multi_axis_types.append(axis_type)
+                    seen_paths.add(f)
+                    axis_stem = axis_stem or match
+
+    # Modified subtitle handling to prevent duplicates
+    subtitle_paths = []
+    for match in best_matches:
+        if match in index.subtitle_map and match not in seen_subtitle_stems:
+            subtitle_path = index.subtitle_map[match]
+            if subtitle_path not in seen_paths:
+                subtitle_paths.append(subtitle_path)
+                seen_subtitle_stems.add(match)
+                seen_paths.add(subtitle_path)
+
+    if not (normal_funscript_path or funscript_paths or subtitle_paths):
+        return best_matches, None
+
+    if normal_funscript_path:
+        script_stem, script_path = normal_funscript_stem, normal_funscript_path
+    elif funscript_paths:
+        script_stem, script_path = axis_stem, funscript_paths[0]
+    else:
+        script_stem, script_path = subtitle_paths[0].stem, subtitle_paths[0]
+
+    # Remove resolution tags from video and funscript names
+    video_base_clean = remove_resolution_tags(video_base)
+    normal_funscript_base_clean = remove_resolution_tags(normal_funscript_path.stem) if normal_funscript_path else None
+    funscript_bases_clean = [remove_resolution_tags(f.stem) for f in funscript_paths]
+    subtitle_bases_clean = [remove_resolution_tags(s.stem) for s in subtitle_paths]
+
+    # Add the new resolution information
+    if tag_with_resolution:
+        resolution = get_resolution(video_path)
+        video_base_clean = f"{video_base_clean}_{resolution}"
+        if normal_funscript_base_clean:
+            normal_funscript_base_clean = f"{normal_funscript_base_clean}_{resolution}"
+        funscript_bases_clean = [f"{base}_{resolution}" for base in funscript_bases_clean]
+        subtitle_bases_clean = [f"{base}_{resolution}" for base in subtitle_bases_clean]
+
+    # Choose the better name based on criteria
+    if normal_funscript_base_clean:
+        better_name, comparison_details = choose_better_name(video_base_clean, normal_funscript_base_clean, prefer_funscript=True)
+    elif funscript_bases_clean:
+        better_name, comparison_details = choose_better_name(video_base_clean, funscript_bases_clean[0], prefer_funscript=True)
+    else:
+        better_name, comparison_details = choose_better_name(video_base_clean, subtitle_bases_clean[0], prefer_funscript=True)
 
-    comparison_details = []
+    new_video_name = f"{better_name}{video_path.suffix}"
+    new_funscript_names = []
+    if normal_funscript_path:
+        new_funscript_names.append((normal_funscript_path, Path(changed_dir / f"{better_name}.funscript")))
+    new_funscript_names.extend(
+        (f, Path(changed_dir / f"{better_name}.{multi_axis_types[i]}.funscript")) for i, f in enumerate(funscript_paths)
+    )
+    new_subtitle_names = [(s, Path(changed_dir / f"{better_name}{s.suffix}")) for s in subtitle_paths]
+    moves = [(video_path, changed_dir / new_video_name)] + new_funscript_names + new_subtitle_names
 
-    # Check if one name contains common identifiers like '[PMV]' or artist name
-    is_name1_funscript = "[PMV]" in name1 or "funscript" in name1.lower()
-    is_name2_funscript = "[PMV]" in name2 or "funscript" in name2.lower()
+    return best_matches, PairProposal(
+        video_path, normal_funscript_path, funscript_paths, multi_axis_types, subtitle_paths,
+        better_name, comparison_details, new_video_name, new_funscript_names, new_subtitle_names, moves,
+        script_stem, script_path,
+    )
 
-    if prefer_funscript:
-        # Prefer the `.funscript` name when it has script-type identifiers or more buzzwords
-        if is_name2_funscript and not is_name1_funscript:
-            comparison_details.append("Funscript contains script type or artist information.")
-            return name2, comparison_details
-        elif is_name1_funscript and not is_name2_funscript:
-            comparison_details.append("Funscript contains script type or artist information.")
-            return name1, comparison_details
+def show_pair_proposal(proposal, changed_dir):
+    """Print a detected pair with its current and proposed names."""
+    video_path = proposal.video_path
+    normal_funscript_path = proposal.normal_funscript_path
+    video_size = video_path.size / (1024 * 1024)  # Size in MB
+
+    console.print("------------------------------------------------------------")
+    console.print(f"Pair Detected:", style="blink bold #48D1CC")
+    console.print(f" ")
+    console.print(f"  Video File: [red]{video_path.name}[/red] (Size: {video_size:.2f} MB)")
+
+    if normal_funscript_path:
+        console.print(f"  Funscript File: [green]{normal_funscript_path.name}[/green]")
+    for i, funscript_path in enumerate(proposal.funscript_paths):
+        axis_type = proposal.multi_axis_types[i]
+        console.print(f"  Multi-Axis Funscript File: [green]{funscript_path.name}[/green] ({axis_type})")
+
+    for subtitle_path in proposal.subtitle_paths:
+        console.print(f"  Subtitle File: [blue]{subtitle_path.name}[/blue]")
+
+    console.print(f" ")
+    console.print(f"Better name chosen based on criteria: {', '.join(proposal.comparison_details)}\n")
+
+    # Frame the current and proposed names
+    old_name_panel = Panel(
+        f"Current: [red]{video_path.name}[/red]\n"
+        + (f"Current: [red]{normal_funscript_path.name}[/red]\n" if normal_funscript_path else "")
+        + "\n".join([f"Current: [red]{f.name}[/red]" for f in proposal.funscript_paths if f != normal_funscript_path])
+        + "\n".join([f"Current: [red]{s.name}[/red]" for s in proposal.subtitle_paths]),
+        title="Old Names"
+    )
+    new_name_panel = Panel(
+        f"New: [green]{proposal.new_video_name}[/green]\n"
+        + (f"New: [green]{Path(changed_dir / f'{proposal.better_name}.funscript').name}[/green]\n" if normal_funscript_path else "")
+        + "\n".join([f"New: [green]{new_name.name}[/green]" for _, new_name in proposal.new_funscript_names if not normal_funscript_path or not new_name.name.endswith('.funscript') or any(ext.split('.')[1] in new_name.name for ext in MULTI_AXIS_EXTENSIONS)])
+        + "\n".join([f"New: [green]{new_name.name}[/green]" for _, new_name in proposal.new_subtitle_names]),
+        title="Proposed Names"
+    )
 
-    # Prioritize the name with more buzzwords
-    if name1_buzzwords > name2_buzzwords:
-        comparison_details.append("Contains more buzzwords.")
-        return name1, comparison_details
-    elif name2_buzzwords > name1_buzzwords:
-        comparison_details.append("Contains more buzzwords.")
-        return name2, comparison_details
+    console.print(old_name_panel)
+    console.print(new_name_panel)
 
-    # If buzzwords are equal, prioritize the longer name
-    if len(name1) > len(name2):
-        comparison_details.append("Is longer and more descriptive.")
-        return name1, comparison_details
-    else:
-        comparison_details.append("Is longer and more descriptive.")
-        return name2, comparison_details
+def execute_pair_moves(files_to_move, moved_files, link_files=False, method_counts=None, log=None):
+    """
+    Move (or link) all files of an approved pair after checking that every source still exists.
+    Messages go to log (console.print by default), e.g. a list's append when moving in the background.
+    """
+    log = log or console.print
+    # Verify all files exist before moving any
+    for old_path, _ in files_to_move:
+        if not old_path.exists():
+            log(f"[red]Error: File {old_path} no longer exists[/red]")
+            return False
 
-# Assuming other necessary imports and helper functions are defined elsewhere
-def rename_files(directory, reference_names, tag_with_resolution, recursive=False, dry_run=False, show_exact_matches=True):
-    # Initialize these variables at the start
-    new_funscript_names = []
-    new_subtitle_names = []
+    # Move all files
+    for old_path, new_path in files_to_move:
+        if old_path not in moved_files and old_path.exists():
+            try:
+                method = organize_file(old_path, new_path, link_files)
+                moved_files.add(old_path)
+                if method_counts is not None:
+                    method_counts[method] += 1
+                if link_files:
+                    log(f"[green]Linked {old_path} to {new_path} ({method})[/green]")
+                else:
+                    log(f"[green]Renamed {old_path} to {new_path}[/green]")
+            except FileExistsError:
+                log(f"[yellow]File already exists in destination: {new_path}[/yellow]")
+            except Exception as e:
+                log(f"[red]Error moving {old_path}: {str(e)}[/red]")
+    return True
+
+class DecisionCache:
+    """
+    Remembered answers to "Approve this change?". Each decision is keyed by the
+    normalized video name and size plus the normalized script name and size, so a
+    pair that was approved or rejected once is not shown again. Decisions are kept
+    in an append-only JSON lines file (later lines win), which makes recording a
+    decision a single write and keeps earlier answers safe if a run is interrupted.
+    """
 
-    """Match and rename video and funscript files."""
+    def __init__(self, path=DECISIONS_FILE):
+        self.path = path
+        self.entries = defaultdict(dict)  # (video key, video size) -> {(script key, script size): approved}
+        self.stats = {"approved": 0, "rejected": 0, "recorded": 0, "unsaved": 0}
+        if not path:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                        video = (entry["video"], entry["video_size"])
+                        self.entries[video][(entry["script"], entry["script_size"])] = bool(entry["approved"])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Skip a torn or hand-edited line
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def video_id(video_base, video_path):
+        return normalize_name(video_base).key, video_path.size
+
+    def remembered_match(self, video_base, video_path, index):
+        """Return [stem] of a previously approved script that is still present, else None."""
+        for (script_key, script_size), approved in self.entries.get(self.video_id(video_base, video_path), {}).items():
+            if not approved:
+                continue
+            for stem in index.stems_by_key.get(script_key, ()):
+                script_path = match_primary_file(index, stem)
+                if script_path is not None and script_path.size == script_size:
+                    self.stats["approved"] += 1
+                    return [stem]
+        return None
+
+    def is_rejected(self, video_base, proposal):
+        """Return True when this exact pair was rejected before."""
+        decisions = self.entries.get(self.video_id(video_base, proposal.video_path), {})
+        if decisions.get((normalize_name(proposal.script_stem).key, proposal.script_path.size)) is False:
+            self.stats["rejected"] += 1
+            return True
+        return False
+
+    def record(self, video_base, proposal, approved):
+        """Remember the answer for a pair and append it to the decisions file. Returns False if saving failed."""
+        video_key, video_size = self.video_id(video_base, proposal.video_path)
+        script_key, script_size = normalize_name(proposal.script_stem).key, proposal.script_path.size
+        self.entries[(video_key, video_size)][(script_key, script_size)] = approved
+        self.stats["recorded"] += 1
+        if not self.path:
+            return True
+        entry = {"video": video_key, "video_size": video_size, "script": script_key,
+                 "script_size": script_size, "approved": approved}
+        try:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError:
+            self.stats["unsaved"] += 1
+            return False
+        return True
+
+def print_decision_stats(decision_stats):
+    """Print how many pairs were settled from memory and how many new answers were saved."""
+    if not any(decision_stats.values()):
+        return
+    console.print(
+        f"[cyan]Remembered decisions: {decision_stats['approved']} approved and {decision_stats['rejected']} rejected "
+        f"without asking, {decision_stats['recorded']} new decisions saved.[/cyan]"
+    )
+    if decision_stats.get("unsaved"):
+        console.print(f"[yellow]Warning: {decision_stats['unsaved']} decisions could not be saved to the decisions file.[/yellow]")
+
+class PairMatcher:
+    """
+    Proposes a pair for each video and settles it, for every front end: match() and its
+    decide callback, the approval prompts of rename_files and the PairReview table.
+    Decisions remembered in the DecisionCache are applied before anyone is asked, an
+    approved pair claims its files and index stems, and a pair that needs a file an
+    approved pair already claimed is dropped. Thread safe, so the review table can
+    settle rows while its background worker proposes more.
+    """
+
+    def __init__(self, index, changed_dir, tag_with_resolution, decisions):
+        self.index = index
+        self.changed_dir = changed_dir
+        self.tag_with_resolution = tag_with_resolution
+        self.decisions = decisions
+        self.claimed_files = set()
+        self.lock = threading.Lock()  # Decisions, claims and the matcher's pool, which approvals shrink
+
+    def propose(self, video_base, video_path):
+        """
+        Fuzzy match one video (or take its remembered script) and work out the pair.
+        Returns (proposal, remembered, by_id, score): proposal is None when nothing matched,
+        remembered is True or False for a decision from an earlier run and None for a new pair,
+        score is the best fuzzy score (None for a remembered pair).
+        """
+        with self.lock:
+            remembered = self.decisions.remembered_match(video_base, video_path, self.index)
+            resolved_by_id = self.index.matcher.id_stats["resolved"]
+            score = None
+            if remembered is None:
+                scored = self.index.matcher.match_with_scores(video_base, os.path.dirname(os.fspath(video_path)))
+                candidates = [stem for stem, _ in scored]
+                score = scored[0][1] if scored else 0
+            else:
+                candidates = remembered
+            by_id = self.index.matcher.id_stats["resolved"] > resolved_by_id
+            _, proposal = propose_pair(video_base, video_path, self.index, self.changed_dir, self.tag_with_resolution, candidates)
+            if proposal is None:
+                return None, None, by_id, score
+            if remembered is not None:
+                return proposal, True, by_id, score
+            if self.decisions.is_rejected(video_base, proposal):
+                return proposal, False, by_id, score
+            return proposal, None, by_id, score
+
+    def settle(self, video_base, proposal, approved, remember=True):
+        """
+        Record a decision (unless remember is False) and let an approved pair claim its files
+        and stems. Returns (settled, saved): settled is False when an approved pair needs a file
+        that another approved pair already claimed, saved is False when recording failed.
+        """
+        sources = {old_path for old_path, _ in proposal.moves}
+        with self.lock:
+            if approved and sources & self.claimed_files:
+                return False, True
+            saved = self.decisions.record(video_base, proposal, approved) if remember else True
+            if approved:
+                self.claimed_files.update(sources)
+                self.index.matcher.claim(proposal_stems(proposal))
+        return True, saved
+
+    def pairs(self, video_map, decide=None):
+        """
+        Yield (video path, PairDecision) for every video in a {stem: file} map, the decision
+        being None when nothing matched. decide(video_base, proposal) answers new pairs with
+        True or False, which is recorded, or None to leave the pair pending for a later
+        settle(); without decide every new pair is approved and nothing is recorded.
+        """
+        for video_base, video_path in video_map.items():
+            proposal, remembered, by_id, score = self.propose(video_base, video_path)
+            if proposal is None:
+                yield video_path, None
+                continue
+            with self.lock:
+                # A file can only be renamed once; the first pair that claims it wins
+                if any(old_path in self.claimed_files for old_path, _ in proposal.moves):
+                    continue
+            if remembered is not None:
+                approved = remembered
+                settled, _ = self.settle(video_base, proposal, approved, remember=False)
+            elif decide is None:
+                approved = True
+                settled, _ = self.settle(video_base, proposal, approved, remember=False)
+            else:
+                approved = decide(video_base, proposal)
+                settled = approved is None or self.settle(video_base, proposal, approved)[0]
+            if settled:
+                yield video_path, PairDecision(proposal, approved, remembered is not None, by_id, score)
+
+class ReviewRow:
+    """One proposed pair in the batch review table."""
+    __slots__ = ("number", "video_base", "proposal", "score", "status", "message")
+
+    def __init__(self, number, video_base, proposal, score):
+        self.number = number
+        self.video_base = video_base
+        self.proposal = proposal
+        self.score = score  # None for a pair approved in an earlier run
+        self.status = "pending"
+        self.message = ""
+
+class PairReview:
+    """
+    Batch review of fuzzy pairs. A background thread matches the videos and adds a
+    row per proposed pair while the operator pages through the table, approving or
+    rejecting rows one by one or in bulk. Approved rows go straight to a background
+    mover (one thread, so moves happen in approval order), so the operator never
+    waits on matching and matching never waits on the operator.
+    """
+    FILTERS = {
+        "all": None,
+        "pending": {"pending"},
+        "approved": {"queued", "moved", "linked", "dry run", "failed"},
+        "rejected": {"rejected", "conflict"},
+    }
+    STATUS_STYLES = {
+        "pending": "yellow", "queued": "cyan", "moved": "green", "linked": "green", "dry run": "green",
+        "failed": "bold red", "rejected": "red", "conflict": "magenta",
+    }
+    HELP = ("a/r <rows|all|page> approve/reject (rows like 3 or 3-7,9)  v <row> details  n/p next/previous page  "
+            "f all|pending|approved|rejected|<min score>  s order|score|name  Enter refresh  q finish")
+
+    def __init__(self, video_map, matcher, dry_run=False, link_files=False, moved_files=None, method_counts=None):
+        self.video_map = video_map
+        self.matcher = matcher
+        self.changed_dir = matcher.changed_dir
+        self.dry_run = dry_run
+        self.link_files = link_files
+        self.moved_files = moved_files if moved_files is not None else set()
+        self.method_counts = method_counts if method_counts is not None else defaultdict(int)
+        self.rows = []
+        self.unmatched = []  # Videos without any match, for 'Not Changed'
+        self.matched_videos = 0
+        self.lock = threading.Lock()  # Rows and their statuses
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.mover = ThreadPoolExecutor(max_workers=1)
+        self.status_filter = "all"
+        self.min_score = 0
+        self.sort = "order"
+        self.page = 0
+
+    def match_videos(self):
+        """Background worker: propose a pair per video and settle remembered decisions."""
+        try:
+            # New pairs are left pending for the operator (decide returns None)
+            for video_path, pair in self.matcher.pairs(self.video_map, lambda video_base, proposal: None):
+                with self.lock:
+                    self.matched_videos += 1
+                    if pair is None:
+                        self.unmatched.append(video_path)
+                        continue
+                    row = ReviewRow(len(self.rows) + 1, video_path.stem, pair.proposal, pair.score)
+                    if pair.approved is not None:
+                        row.status = "queued" if pair.approved else "rejected"  # Never offered as pending
+                    self.rows.append(row)
+                if pair.approved is not None:
+                    self.settled(row, pair.approved,
+                                 "approved in an earlier run" if pair.approved else "rejected in an earlier run")
+                if self.stopped.is_set():
+                    break
+        finally:
+            self.finished.set()
+
+    def decide(self, row, approved):
+        """Approve or reject a pending row; approved rows are queued for moving at once."""
+        with self.lock:
+            if row.status != "pending":
+                return
+        settled, saved = self.matcher.settle(row.video_base, row.proposal, approved)
+        if not settled:
+            with self.lock:
+                row.status, row.message = "conflict", "a file already belongs to an approved pair"
+            return
+        self.settled(row, approved, "" if saved else f"could not save decision to {self.matcher.decisions.path}")
+
+    def settled(self, row, approved, message=""):
+        """Show a decision the PairMatcher has settled; approved rows go to the mover."""
+        with self.lock:
+            row.status = "queued" if approved else "rejected"
+            row.message = message
+            if not approved:
+                return
+            sources = {old_path for old_path, _ in row.proposal.moves}
+            # Pending pairs that share a file with this one can no longer be approved
+            for other in self.rows:
+                if other.status == "pending" and sources & {old_path for old_path, _ in other.proposal.moves}:
+                    other.status, other.message = "conflict", f"shares a file with row {row.number}"
+        self.mover.submit(self.move, row)
+
+    def move(self, row):
+        """Background mover: rename (or link) the files of an approved row."""
+        if self.dry_run:
+            row.status = "dry run"
+            row.message = f"would rename to {row.proposal.new_video_name}"
+            return
+        messages = []
+        try:
+            self.changed_dir.mkdir(parents=True, exist_ok=True)
+            execute_pair_moves(row.proposal.moves, self.moved_files, self.link_files, self.method_counts, messages.append)
+        except Exception as e:
+            messages.append(str(e))
+        if all(old_path in self.moved_files for old_path, _ in row.proposal.moves):
+            row.status = "linked" if self.link_files else "moved"
+        else:
+            row.status = "failed"
+            row.message = Text.from_markup(messages[-1]).plain if messages else "not every file could be moved"
+
+    def visible_rows(self):
+        """Rows passing the status and score filters, in the chosen order."""
+        with self.lock:
+            rows = list(self.rows)
+        statuses = self.FILTERS[self.status_filter]
+        rows = [row for row in rows if (statuses is None or row.status in statuses)
+                and (row.score is None or row.score >= self.min_score)]
+        if self.sort == "score":
+            rows.sort(key=lambda row: 101 if row.score is None else row.score, reverse=True)
+        elif self.sort == "name":
+            rows.sort(key=lambda row: row.video_base.casefold())
+        return rows
+
+    def render(self, rows):
+        """Print the current page of the table and the progress line."""
+        pages = max(1, -(-len(rows) // REVIEW_PAGE_SIZE))
+        self.page = min(self.page, pages - 1)
+        table = Table(title=f"Pair Review (page {self.page + 1}/{pages})", header_style="bold cyan")
+        table.add_column("#", justify="right", no_wrap=True)
+        table.add_column("Score", justify="right", no_wrap=True)
+        table.add_column("Video", overflow="fold")
+        table.add_column("Scripts", overflow="fold")
+        table.add_column("New name", overflow="fold")
+        table.add_column("Status", overflow="fold")
+        for row in rows[self.page * REVIEW_PAGE_SIZE:(self.page + 1) * REVIEW_PAGE_SIZE]:
+            proposal = row.proposal
+            scripts = [old_path.name for old_path, _ in proposal.moves[1:]]
+            style = self.STATUS_STYLES[row.status]
+            table.add_row(
+                str(row.number), "-" if row.score is None else f"{row.score:.0f}", proposal.video_path.name,
+                "\n".join(scripts), proposal.better_name,
+                f"[{style}]{row.status}[/{style}]" + (f"\n{row.message}" if row.message else ""),
+            )
+        console.print(table)
+
+        with self.lock:
+            counts = defaultdict(int)
+            for row in self.rows:
+                counts[row.status] += 1
+            matched = self.matched_videos
+        progress = "done" if self.finished.is_set() else "still matching in the background"
+        console.print(
+            f"[blue]Matched {matched}/{len(self.video_map)} videos ({progress}): {len(self.rows)} pairs, "
+            f"{counts['pending']} pending, {counts['queued']} queued, "
+            f"{counts['moved'] + counts['linked'] + counts['dry run']} done, {counts['failed']} failed, "
+            f"{counts['rejected'] + counts['conflict']} rejected. "
+            f"Filter: {self.status_filter}, score >= {self.min_score}, sorted by {self.sort}.[/blue]"
+        )
+        console.print(f"[dim]{self.HELP}[/dim]")
+
+    def select(self, text, rows):
+        """Resolve a row selection ("3", "3-7,9", "all", "page") against the visible rows."""
+        if text == "all":
+            return [row for row in rows if row.status == "pending"]
+        if text == "page":
+            page_rows = rows[self.page * REVIEW_PAGE_SIZE:(self.page + 1) * REVIEW_PAGE_SIZE]
+            return [row for row in page_rows if row.status == "pending"]
+        numbers = set()
+        for part in text.replace(" ", "").split(","):
+            first, _, last = part.partition("-")
+            numbers.update(range(int(first), int(last or first) + 1))
+        with self.lock:
+            return [row for row in self.rows if row.number in numbers]
+
+    def handle(self, command, rows):
+        """Run one review command. Returns False when the review is finished."""
+        action, _, argument = command.partition(" ")
+        argument = argument.strip().lower()
+        try:
+            if action in ("a", "r"):
+                for row in self.select(argument, rows):
+                    self.decide(row, action == "a")
+            elif action == "v":
+                row = self.select(argument, rows)[0]
+                clear_console()
+                show_pair_proposal(row.proposal, self.changed_dir)
+                Prompt.ask("[cyan]Press Enter to return to the table[/cyan]", default="", show_default=False)
+            elif action == "n":
+                self.page += 1
+            elif action == "p":
+                self.page = max(0, self.page - 1)
+            elif action == "f":
+                if argument in self.FILTERS:
+                    self.status_filter = argument
+                    self.min_score = 0 if argument == "all" else self.min_score
+                else:
+                    self.min_score = float(argument.lstrip(">="))
+                self.page = 0
+            elif action == "s" and argument in ("order", "score", "name"):
+                self.sort = argument
+                self.page = 0
+            elif action == "q":
+                with self.lock:
+                    pending = sum(row.status == "pending" for row in self.rows)
+                if pending or not self.finished.is_set():
+                    console.print(create_styled_prompt(
+                        f"{pending} undecided pair(s){'' if self.finished.is_set() else ', matching is still running'}. "
+                        "Finish and leave them unchanged?"
+                    ))
+                    return not Confirm.ask("", default=False)
+                return False
+        except (ValueError, IndexError):
+            pass  # Malformed selection, just show the table again
+        return True
+
+    def run(self):
+        """Show the review table until the operator finishes. Returns the unmatched videos."""
+        worker = threading.Thread(target=self.match_videos, daemon=True)
+        worker.start()
+        try:
+            while True:
+                rows = self.visible_rows()
+                clear_console()
+                self.render(rows)
+                command = Prompt.ask("[cyan]Command[/cyan]", default="", show_default=False).strip()
+                if not self.handle(command, rows):
+                    break
+        finally:
+            self.stopped.set()
+            worker.join()
+            console.print("[yellow]Waiting for the queued moves to finish...[/yellow]")
+            self.mover.shutdown(wait=True)
+        for row in self.rows:
+            if row.status == "failed":
+                console.print(f"[red]Error moving {row.proposal.video_path.name}: {row.message}[/red]")
+        return self.unmatched
+
+def rename_files(directory, reference_names, tag_with_resolution, recursive=False, dry_run=False, show_exact_matches=True, link_files=False,
+                 batch_review=False, low_memory=LOW_MEMORY_EXACT_MATCHING):
+    """
+    Match and rename video and funscript files. With link_files the originals are linked into FunForge, not moved.
+    With batch_review the pairs are reviewed in a PairReview table instead of one prompt per pair.
+    With low_memory exact matching goes through sorted runs on disk (see SortMergeExactJoin).
+    """
     funforge_dir = directory / "FunForge"
     changed_dir = funforge_dir / "Changed"
     not_changed_dir = funforge_dir / "Not Changed"
@@ -800,238 +3429,72 @@ def rename_files(directory, reference_names, tag_with_resolution, recursive=Fals
     already_same_name_dir.mkdir(parents=True, exist_ok=True)
 
     spinner_animation("Scanning for video, funscript, and subtitle files...")
-    video_files = collect_files_with_extension(directory, VIDEO_EXTENSIONS, recursive)
-
-    # Collect main funscripts first
-    funscript_files = collect_files_with_extension(directory, [".funscript"], recursive)
-    multi_axis_files = []
-    seen_base_names = {f.stem for f in funscript_files}
-
-    # Collect multi-axis files, avoiding duplicates by checking base names
-    for ext in MULTI_AXIS_EXTENSIONS:
-        for f in collect_files_with_extension(directory, [ext], recursive):
-            base_name = f.name[:-(len(ext))]  # Remove the extension to get base name
-            if base_name not in seen_base_names:
-                multi_axis_files.append(f)
-                seen_base_names.add(base_name)
-
-    # Combine all funscript files
-    funscript_files.extend(multi_axis_files)
-
-    subtitle_files = collect_files_with_extension(directory, SUBTITLE_EXTENSIONS, recursive)
-    archive_files = collect_files_with_extension(directory, ARCHIVE_EXTENSIONS, recursive)
 
-    console.print(f"[blue]Found {len(video_files)} video files, {len(funscript_files)} funscript files ({len(multi_axis_files)} multi-axis), {len(subtitle_files)} subtitle files, and {len(archive_files)} archive files.[/blue]\n")
+    # Scan, classify and move 100% matching files to "Already Same Name" as one pipeline
+    video_files, funscript_files, subtitle_files, archive_files, counts = stream_exact_matches(
+        directory, recursive, already_same_name_dir, dry_run, show_exact_matches, link_files, low_memory
+    )
 
-    # Move 100% matching files to "Already Same Name" directory first
-    video_files, funscript_files, subtitle_files = move_exact_matches(video_files, funscript_files, subtitle_files, already_same_name_dir, dry_run, show_exact_matches)
+    console.print(f"[blue]Found {counts['video']} video files, {counts['funscript']} funscript files ({counts['multi_axis']} multi-axis), {counts['subtitle']} subtitle files, and {counts['archive']} archive files.[/blue]\n")
 
     # Create mappings of base names to full paths
     video_map = {f.stem: f for f in video_files}
-    funscript_map = {f.stem: f for f in funscript_files}
-    subtitle_map = {f.stem: f for f in subtitle_files}
+    index = build_match_index(funscript_files, subtitle_files, video_files)
 
     not_changed_files = []
 
     # Add a set to track moved files
     moved_files = set()
-
-    # Improved multi-axis extension handling
-    for video_base, video_path in video_map.items():
-        # Reset lists for each video file
-        new_funscript_names = []
-        new_subtitle_names = []
-
-        funscript_stems = []
-        multi_axis_dict = {}  # Keep track of multi-axis files by their base name
-
-        # First collect all funscript base names
-        for f in funscript_files:
-            is_multi_axis = False
-            for ext in MULTI_AXIS_EXTENSIONS:
-                if f.name.endswith(ext):
-                    is_multi_axis = True
-                    base_name = f.name[:-len(ext)]
-                    axis_type = ext.split('.')[1]
-                    if base_name not in multi_axis_dict:
-                        multi_axis_dict[base_name] = []
-                    multi_axis_dict[base_name].append((f, axis_type))
-                    break
-
-            if not is_multi_axis:
-                funscript_stems.append(f.stem)
-
-        # Add base names for multi-axis files
-        funscript_stems.extend(multi_axis_dict.keys())
-
-        subtitle_stems = [s.stem for s in subtitle_files]
-        all_stems = funscript_stems + subtitle_stems
-
-        best_matches = fuzzy_match(video_base, all_stems)
-        console.print(f"Best matches for {video_base}: {best_matches}")  # Debugging information
-
-        if best_matches:
-            funscript_paths = []
-            multi_axis_types = []
-            normal_funscript_path = None
-            seen_paths = set()  # Track which paths we've already added
-            seen_subtitle_stems = set()  # Initialize the set for tracking subtitle stems
-            seen_funscript_stems = set()  # Initialize the set for tracking funscript stems
-
-            for match in best_matches:
-                # Check for normal funscript
-                if match in funscript_map and match not in seen_funscript_stems:
-                    normal_funscript_path = funscript_map[match].with_suffix(".funscript")
-                    seen_paths.add(normal_funscript_path)
-                    seen_funscript_stems.add(match)
-
-                # Check for multi-axis funscripts
-                if match in multi_axis_dict:
-                    for f, axis_type in multi_axis_dict[match]:
-                        if f not in seen_paths:  # Only add if we haven't seen this path before
-                            funscript_paths.append(f)
-                            multi_axis_types.append(axis_type)
-                            seen_paths.add(f)
-
-            # Modified subtitle handling to prevent duplicates
-            subtitle_paths = []
-            for match in best_matches:
-                if match in subtitle_map and match not in seen_subtitle_stems:
-                    subtitle_path = subtitle_map[match]
-                    if subtitle_path not in seen_paths:
-                        subtitle_paths.append(subtitle_path)
-                        seen_subtitle_stems.add(match)
-                        seen_paths.add(subtitle_path)
-
-            if normal_funscript_path or funscript_paths or subtitle_paths:
-                clear_console()
-
-                video_size = video_path.stat().st_size / (1024 * 1024)  # Size in MB
-
-                console.print("------------------------------------------------------------")
-                console.print(f"Pair Detected:", style="blink bold #48D1CC")
-                console.print(f" ")
-                console.print(f"  Video File: [red]{video_path.name}[/red] (Size: {video_size:.2f} MB)")
-
-                if normal_funscript_path:
-                    console.print(f"  Funscript File: [green]{normal_funscript_path.name}[/green]")
-                for i, funscript_path in enumerate(funscript_paths):
-                    axis_type = multi_axis_types[i]
-                    console.print(f"  Multi-Axis Funscript File: [green]{funscript_path.name}[/green] ({axis_type})")
-
-                for subtitle_path in subtitle_paths:
-                    console.print(f"  Subtitle File: [blue]{subtitle_path.name}[/blue]")
-                
-                # Remove resolution tags from video and funscript names
-                video_base_clean = remove_resolution_tags(video_base)
-                normal_funscript_base_clean = remove_resolution_tags(normal_funscript_path.stem) if normal_funscript_path else None
-                funscript_bases_clean = [remove_resolution_tags(f.stem) for f in funscript_paths]
-                subtitle_bases_clean = [remove_resolution_tags(s.stem) for s in subtitle_paths]
-
-                # Add the new resolution information
-                if tag_with_resolution:
-                    resolution = get_resolution(video_path)
-                    video_base_clean = f"{video_base_clean}_{resolution}"
-                    if normal_funscript_base_clean:
-                        normal_funscript_base_clean = f"{normal_funscript_base_clean}_{resolution}"
-                    funscript_bases_clean = [f"{base}_{resolution}" for base in funscript_bases_clean]
-                    subtitle_bases_clean = [f"{base}_{resolution}" for base in subtitle_bases_clean]
-
-                # Choose the better name based on criteria
-                better_name = video_base_clean
-                if normal_funscript_base_clean:
-                    better_name, comparison_details = choose_better_name(video_base_clean, normal_funscript_base_clean, prefer_funscript=True)
-                elif funscript_bases_clean:
-                    better_name, comparison_details = choose_better_name(video_base_clean, funscript_bases_clean[0], prefer_funscript=True)
-                elif subtitle_bases_clean:
-                    better_name, comparison_details = choose_better_name(video_base_clean, subtitle_bases_clean[0], prefer_funscript=True)
-
-                new_video_name = f"{better_name}{video_path.suffix}"
-                if normal_funscript_path:
-                    new_funscript_names.append((normal_funscript_path, Path(changed_dir / f"{better_name}.funscript")))
-                new_funscript_names.extend(
-                    (f, Path(changed_dir / f"{better_name}.{multi_axis_types[i]}.funscript")) for i, f in enumerate(funscript_paths)
-                )
-                new_subtitle_names = [(s, Path(changed_dir / f"{better_name}{s.suffix}")) for s in subtitle_paths]
-                
-                console.print(f" ")
-                console.print(f"Better name chosen based on criteria: {', '.join(comparison_details)}\n")
-
-                # Frame the current and proposed names
-                old_name_panel = Panel(
-                    f"Current: [red]{video_path.name}[/red]\n"
-                    + (f"Current: [red]{normal_funscript_path.name}[/red]\n" if normal_funscript_path else "")
-                    + "\n".join([f"Current: [red]{f.name}[/red]" for f in funscript_paths if f != normal_funscript_path])
-                    + "\n".join([f"Current: [red]{s.name}[/red]" for s in subtitle_paths]),
-                    title="Old Names"
-                )
-                new_name_panel = Panel(
-                    f"New: [green]{new_video_name}[/green]\n"
-                    + (f"New: [green]{Path(changed_dir / f'{better_name}.funscript').name}[/green]\n" if normal_funscript_path else "")
-                    + "\n".join([f"New: [green]{new_name.name}[/green]" for _, new_name in new_funscript_names if not normal_funscript_path or not new_name.name.endswith('.funscript') or any(ext.split('.')[1] in new_name.name for ext in MULTI_AXIS_EXTENSIONS)])
-                    + "\n".join([f"New: [green]{new_name.name}[/green]" for _, new_name in new_subtitle_names]),
-                    title="Proposed Names"
-                )
-
-                console.print(old_name_panel)
-                console.print(new_name_panel)
-
-                console.print(create_styled_prompt("Approve this change?"))
-                user_input = Confirm.ask("", default=True)
-
-                if user_input:
-                    if dry_run:
-                        console.print(f"[yellow][DRY RUN] Would rename {video_path} to {new_video_name}[/yellow]")
-                        for old_name, new_name in new_funscript_names:
-                            console.print(f"[yellow][DRY RUN] Would rename {old_name} to {new_name}[/yellow]")
-                        for old_name, new_name in new_subtitle_names:
-                            console.print(f"[yellow][DRY RUN] Would rename {old_name} to {new_name}[/yellow]")
-                    else:
-                        try:
-                            # Create all necessary directories first
-                            changed_dir.mkdir(parents=True, exist_ok=True)
-
-                            # Move all files in a single transaction-like block
-                            files_to_move = [
-                                (video_path, changed_dir / new_video_name)
-                            ]
-                            
-                            # Add funscript files to the move list
-                            files_to_move.extend(new_funscript_names)
-                            
-                            # Add subtitle files to the move list
-                            files_to_move.extend(new_subtitle_names)
-
-                            # Verify all files exist before moving any
-                            all_files_exist = True
-                            for old_path, _ in files_to_move:
-                                if not old_path.exists():
-                                    console.print(f"[red]Error: File {old_path} no longer exists[/red]")
-                                    all_files_exist = False
-                                    break
-
-                            if all_files_exist:
-                                # Move all files
-                                for old_path, new_path in files_to_move:
-                                    if old_path not in moved_files and old_path.exists():
-                                        try:
-                                            old_path.rename(new_path)
-                                            moved_files.add(old_path)
-                                            console.print(f"[green]Renamed {old_path} to {new_path}[/green]")
-                                        except Exception as e:
-                                            console.print(f"[red]Error moving {old_path}: {str(e)}[/red]")
-
-                        except Exception as e:
-                            console.print(f"[red]Error during file movement: {str(e)}[/red]")
-                            continue
-
-        else:
+    method_counts = defaultdict(int)
+    decisions = DecisionCache()
+    matcher = PairMatcher(index, changed_dir, tag_with_resolution, decisions)
+
+    if batch_review:
+        review = PairReview(video_map, matcher, dry_run, link_files, moved_files, method_counts)
+        unmatched_videos = review.run()
+        for video_path in unmatched_videos:
+            console.print(f"No good match found for [red]{video_path.name}[/red]. Moving to 'Not Changed'.\n")
+        not_changed_files.extend(unmatched_videos)
+        video_map = {}  # Already reviewed
+
+    def ask(video_base, proposal):
+        clear_console()
+        show_pair_proposal(proposal, changed_dir)
+        console.print(create_styled_prompt("Approve this change?"))
+        return Confirm.ask("", default=True)
+
+    # A pair approved or rejected in an earlier run is settled without asking
+    for video_path, pair in matcher.pairs(video_map, ask):
+        if pair is None:
             console.print(f"No good match found for [red]{video_path.name}[/red]. Moving to 'Not Changed'.\n")
             not_changed_files.append(video_path)
+            continue
+        if pair.remembered:
+            if pair.approved:
+                console.print(f"[green]Approved in an earlier run: {video_path.name}[/green]")
+            else:
+                console.print(f"[yellow]Rejected in an earlier run, skipping: {video_path.name}[/yellow]")
+        if not pair.approved:
+            continue
+        if dry_run:
+            for old_name, new_name in pair.proposal.moves:
+                console.print(f"[yellow][DRY RUN] Would rename {old_name} to {new_name}[/yellow]")
+        else:
+            try:
+                # Create all necessary directories first
+                changed_dir.mkdir(parents=True, exist_ok=True)
+                execute_pair_moves(pair.proposal.moves, moved_files, link_files, method_counts)
+            except Exception as e:
+                console.print(f"[red]Error during file movement: {str(e)}[/red]")
+    claimed_files = matcher.claimed_files
+
+    print_stage_stats(index.matcher.stats)
+    print_tier_stats(index.matcher.tier_stats)
+    print_id_stats(index.matcher.id_stats)
+    print_decision_stats(decisions.stats)
 
     # Move all unmatched .funscript files, subtitle files, and archive files to 'Not Changed' folder
-    matched_files = {f[0] for f in new_funscript_names} | {s[0] for s in new_subtitle_names}
-    unused_files = set(funscript_files + subtitle_files + archive_files) - matched_files
+    unused_files = set(funscript_files + subtitle_files + archive_files) - claimed_files
 
     # Modify the handling of not_changed_files to check against moved_files
     for unused_file in unused_files:
@@ -1043,13 +3506,14 @@ def rename_files(directory, reference_names, tag_with_resolution, recursive=Fals
         for file_path in not_changed_files:
             if file_path not in moved_files and file_path.exists():
                 try:
-                    file_path.rename(not_changed_dir / file_path.name)
+                    method_counts[organize_file(file_path, not_changed_dir / file_path.name, link_files)] += 1
                     moved_files.add(file_path)
-                    console.print(f"Moved {file_path} to 'Not Changed' directory.\n")
+                    console.print(f"{'Linked' if link_files else 'Moved'} {file_path} to 'Not Changed' directory.\n")
                 except FileNotFoundError:
                     console.print(f"[yellow]Warning: Could not find file {file_path}[/yellow]")
                 except Exception as e:
                     console.print(f"[red]Error moving file {file_path}: {str(e)}[/red]")
+        print_link_summary(method_counts)
 
     # Add this section to handle the "Already Same Name" only scenario
     if not video_files and not funscript_files and not subtitle_files:
@@ -1062,70 +3526,543 @@ def rename_files(directory, reference_names, tag_with_resolution, recursive=Fals
 
     console.print("\nProcessing complete.")
 
-def cleanup_empty_folders(directory, exclude_dir="FunForge"):
+# Embeddable API. scan(), match(), plan() and apply() never print or prompt, so FunForge
+# can be driven from another program or a worker process; the interactive functions
+# above and below are the command line layer built on the same pieces.
+
+# warnings: messages about directories that could not be read or were skipped
+ScanResult = namedtuple("ScanResult", ["directory", "videos", "funscripts", "subtitles", "archives", "warnings"], defaults=((),))
+# remembered is True when the decision came from the decisions file instead of decide();
+# by_id is True when the pair was settled by a unique shared scene identifier instead of fuzzy scoring;
+# score is the best fuzzy score (None for a remembered pair); approved is None while a review row is pending
+PairDecision = namedtuple("PairDecision", ["proposal", "approved", "remembered", "by_id", "score"], defaults=(False, None))
+# exact: exact match sets of (file, kind); pairs: PairDecision per proposed pair;
+# unmatched: files that would go to 'Not Changed' (videos first);
+# stage_stats / decision_stats / tier_stats / id_stats: the FuzzyCascade, DecisionCache and LocalityMatcher counters
+MatchResult = namedtuple("MatchResult", ["directory", "exact", "pairs", "unmatched", "stage_stats", "decision_stats", "tier_stats",
+                                         "id_stats"], defaults=(None, None))
+# problems: plan entries that failed validation; errors: entries that failed while moving
+ApplyResult = namedtuple("ApplyResult", ["applied", "problems", "errors"])
+
+def scan(directory, recursive=True):
+    """Scan a directory once and return its files (FileRecords) by kind as a ScanResult."""
+    directory = Path(directory)
+    warnings = []
+    scanned = scan_files(directory, recursive, log=warnings.append)
+    return ScanResult(directory, scanned["video"], scanned["funscript"], scanned["subtitle"], scanned["archive"], warnings)
+
+def match(scanned, tag_with_resolution=False, decide=None, decisions_file=None):
+    """
+    Exact-match and fuzzy-match a ScanResult (a directory is scanned first). decide is
+    called as decide(proposal) -> bool for every new pair in place of the approval
+    prompt; without it every pair is approved. With decisions_file, remembered
+    decisions are applied first and answers from decide are saved there.
+    Returns a MatchResult; no file is touched.
     """
-    Recursively clean up empty folders after processing.
+    if not isinstance(scanned, ScanResult):
+        scanned = scan(scanned)
+    changed_dir = scanned.directory / "FunForge" / "Changed"
+
+    join = ExactMatchJoin()
+    exact = join.add(
+        [("video", f) for f in scanned.videos]
+        + [("funscript", f) for f in scanned.funscripts]
+        + [("subtitle", s) for s in scanned.subtitles]
+    )
+    video_files, funscript_files, subtitle_files = join.remaining()
+    index = build_match_index(funscript_files, subtitle_files, video_files)
+    decisions = DecisionCache(decisions_file)
+    matcher = PairMatcher(index, changed_dir, tag_with_resolution, decisions)
+    answer = None if decide is None else (lambda video_base, proposal: bool(decide(proposal)))
+
+    pairs = []
+    unmatched = []
+    for video_path, pair in matcher.pairs({f.stem: f for f in video_files}, answer):
+        if pair is None:
+            unmatched.append(video_path)
+        else:
+            pairs.append(pair)
+
+    unmatched.extend(f for f in funscript_files + subtitle_files + scanned.archives if f not in matcher.claimed_files)
+    return MatchResult(scanned.directory, exact, pairs, unmatched, index.matcher.stats, decisions.stats,
+                       index.matcher.tier_stats, index.matcher.id_stats)
+
+def plan(matched):
+    """Turn a MatchResult into plan entries (PLAN_FIELDS dicts) with paths relative to its directory."""
+    directory = matched.directory
+    funforge_dir = directory / "FunForge"
+    not_changed_dir = funforge_dir / "Not Changed"
+    already_same_name_dir = funforge_dir / "Already Same Name"
+
+    def relative(path):
+        return Path(os.path.relpath(os.fspath(path), directory)).as_posix()
+
+    entries = []
+
+    def add_entry(group, action, source, target, reason=""):
+        entries.append({
+            "group": group,
+            "action": action,
+            "kind": plan_kind(source),
+            "source": relative(source),
+            "target": relative(target),
+            "reason": reason,
+        })
+
+    group = 0
+    key_groups = {}  # Files that joined an earlier match set share its group
+    for matched_set in matched.exact:
+        key = exact_match_key(matched_set[0][0].stem)
+        if key not in key_groups:
+            group += 1
+            key_groups[key] = group
+        for file_path, _ in matched_set:
+            add_entry(key_groups[key], "exact", file_path, already_same_name_dir / file_path.name, "Same name")
+
+    # Rejected pairs stay where they are, like a rejected prompt
+    for pair in matched.pairs:
+        if not pair.approved:
+            continue
+        group += 1
+        reason = ", ".join(pair.proposal.comparison_details)
+        for old_path, new_path in pair.proposal.moves:
+            add_entry(group, "rename", old_path, new_path, reason)
+
+    for unused_file in matched.unmatched:
+        group += 1
+        reason = "No good match" if plan_kind(unused_file) == "video" else "No match"
+        add_entry(group, "not_changed", unused_file, not_changed_dir / unused_file.name, reason)
+
+    return entries
+
+def apply(entries, directory=None, link_files=False):
+    """
+    Validate plan entries (or a MatchResult, planned first) against the directory and
+    execute the valid ones, linking instead of moving with link_files. Returns an ApplyResult.
+    """
+    if isinstance(entries, MatchResult):
+        directory = directory or entries.directory
+        entries = plan(entries)
+    valid, problems = validate_plan(entries, directory)
+    applied, errors = apply_plan(valid, directory, link_files)
+    return ApplyResult(applied, problems, errors)
+
+def plan_kind(path):
+    """Return the plan 'kind' column for a file: video, funscript, axis, subtitle or archive."""
+    name_lower = path.name.lower()
+    if name_lower.endswith(tuple(ext.lower() for ext in MULTI_AXIS_EXTENSIONS)):
+        return "axis"
+    sibling_names = None
+    if archive_volume(path.name):
+        try:
+            sibling_names = {name.lower() for name in os.listdir(path.parent)}
+        except OSError:
+            pass
+    return file_kind(path.name, sibling_names)
+
+def write_plan(plan, plan_path):
+    """Write a rename plan as JSON, or as CSV when the file name ends in .csv."""
+    plan_path = Path(plan_path)
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    if plan_path.suffix.lower() == ".csv":
+        with open(plan_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=PLAN_FIELDS)
+            writer.writeheader()
+            writer.writerows(plan)
+    else:
+        with open(plan_path, "w", encoding="utf-8") as file:
+            json.dump({"version": PLAN_VERSION, "entries": plan}, file, indent=2, ensure_ascii=False)
+    return plan_path
+
+def load_plan(plan_path):
+    """Load a rename plan written by write_plan (and possibly edited by hand)."""
+    plan_path = Path(plan_path)
+    if plan_path.suffix.lower() == ".csv":
+        with open(plan_path, "r", encoding="utf-8", newline="") as file:
+            entries = list(csv.DictReader(file))
+    else:
+        with open(plan_path, "r", encoding="utf-8") as file:
+            entries = json.load(file)["entries"]
+    for entry in entries:
+        entry["group"] = str(entry.get("group", ""))
+    return entries
+
+def validate_plan(plan, directory):
+    """
+    Check a plan against the filesystem in one batch: each parent directory is
+    listed once instead of stat'ing every path. Groups with any problem are dropped
+    as a whole so a video never gets separated from its scripts.
+    Returns (valid entries, list of problem messages).
+    """
+    root = os.path.abspath(directory)
+    listings = {}
+
+    def names_in(parent):
+        if parent not in listings:
+            try:
+                listings[parent] = set(os.listdir(parent))
+            except OSError:
+                listings[parent] = set()
+        return listings[parent]
+
+    def resolve(relative_path):
+        path = os.path.abspath(os.path.join(root, relative_path))
+        return path if os.path.commonpath([root, path]) == root else None
+
+    problems = []
+    bad_groups = set()
+    sources = set()
+    targets = set()
+    for entry in plan:
+        source = resolve(entry.get("source", ""))
+        target = resolve(entry.get("target", ""))
+        problem = None
+        if entry.get("action") not in PLAN_ACTIONS:
+            problem = f"unknown action '{entry.get('action')}'"
+        elif source is None or target is None:
+            problem = "path outside the target directory"
+        elif os.path.basename(source) not in names_in(os.path.dirname(source)):
+            problem = "source file does not exist"
+        elif source in sources:
+            problem = "source file appears more than once"
+        elif target in targets:
+            problem = "two files would get the same target name"
+        elif target != source and os.path.basename(target) in names_in(os.path.dirname(target)):
+            problem = "target file already exists"
+        if problem:
+            problems.append(f"{entry.get('source')}: {problem}")
+            bad_groups.add(entry["group"])
+        else:
+            sources.add(source)
+            targets.add(target)
+
+    valid = [entry for entry in plan if entry["group"] not in bad_groups]
+    return valid, problems
+
+def apply_plan(plan, directory, link_files=False):
+    """
+    Execute validated plan entries (linking instead of moving with link_files).
+    Returns (number of files placed, error messages).
+    """
+    root = Path(directory)
+    created_dirs = set()
+    moved = 0
+    errors = []
+    for entry in plan:
+        source = root / entry["source"]
+        target = root / entry["target"]
+        if source == target:
+            continue
+        if target.parent not in created_dirs:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(target.parent)
+        try:
+            organize_file(source, target, link_files)
+            moved += 1
+        except Exception as e:
+            errors.append(f"{entry['source']}: {str(e)}")
+    return moved, errors
+
+def plan_mode(directory, tag_with_resolution, recursive):
+    """CLI: compute a rename plan and write it to a file."""
+    plan_path = Prompt.ask(
+        "Where should the plan be written? (.json or .csv)",
+        default=str(directory / "FunForge" / "rename_plan.json")
+    )
+    console.print("[yellow]Planning...[/yellow]")
+    scanned = scan(directory, recursive)
+    for warning in scanned.warnings:
+        console.print(f"[yellow]{warning}[/yellow]")
+    matched = match(scanned, tag_with_resolution, decisions_file=DECISIONS_FILE)
+    print_stage_stats(matched.stage_stats)
+    print_tier_stats(matched.tier_stats)
+    print_id_stats(matched.id_stats)
+    print_decision_stats(matched.decision_stats)
+    entries = plan(matched)
+    write_plan(entries, plan_path)
+
+    action_counts = defaultdict(int)
+    for entry in entries:
+        action_counts[entry["action"]] += 1
+    console.print(f"[green]Wrote {len(entries)} planned moves to {plan_path}[/green]")
+    console.print(f"  Exact matches: {action_counts['exact']}, renames: {action_counts['rename']}, not changed: {action_counts['not_changed']}")
+
+def apply_mode(directory):
+    """CLI: load an (edited) plan, validate it and execute it."""
+    plan_path = Prompt.ask("Plan file to apply", default=str(directory / "FunForge" / "rename_plan.json"))
+    try:
+        entries = load_plan(plan_path)
+    except Exception as e:
+        console.print(f"[red]Could not load plan {plan_path}: {str(e)}[/red]")
+        return
+
+    valid, problems = validate_plan(entries, directory)
+    if problems:
+        console.print(f"[yellow]{len(problems)} plan entries cannot be applied:[/yellow]")
+        for problem in problems[:CLEANUP_PREVIEW_LIMIT]:
+            console.print(f"  - [red]{problem}[/red]")
+        if len(problems) > CLEANUP_PREVIEW_LIMIT:
+            console.print(f"  ... and {len(problems) - CLEANUP_PREVIEW_LIMIT} more")
+
+    console.print(create_styled_prompt(f"Apply {len(valid)} of {len(entries)} planned moves?"))
+    if not valid or not Confirm.ask("", default=True):
+        return
+    console.print(create_styled_prompt("Link files instead of moving them (originals stay in place)?"))
+    link_files = Confirm.ask("", default=False)
+    lease, holder = acquire_library_lease(directory)
+    if lease is None:
+        console.print(f"[yellow]{directory} is being organized by {holder}; try again when it is done.[/yellow]")
+        return
+    try:
+        moved, errors = apply_plan(valid, directory, link_files)
+    finally:
+        lease.release()
+    for error in errors:
+        console.print(f"[red]Error moving {error}[/red]")
+    console.print(f"[green]Applied plan: {'linked' if link_files else 'moved'} {moved} files.[/green]")
+
+# counts: number of plan entries per action; applied / errors are 0 / [] when the plan was only written;
+# held_back: fuzzy pairs left in the plan for review instead of being applied
+BatchRootResult = namedtuple("BatchRootResult", ["root", "files", "counts", "applied", "errors", "seconds", "plan_path", "held_back"],
+                             defaults=(0,))
+
+def init_batch_worker(buzzwords):
+    """Process pool initializer: install the buzzwords refined once by the parent process."""
+    global BUZZWORDS
+    BUZZWORDS = buzzwords
+
+def process_root(root, tag_with_resolution, recursive, apply_changes, link_files, apply_fuzzy=False):
+    """
+    Batch worker: plan one library root (and apply the plan) through the API. Returns a BatchRootResult.
+    Nobody reviews the fuzzy pairs of a batch run, so unless apply_fuzzy is set only exact matches,
+    remembered approvals and pairs settled by a scene identifier are applied; the other pairs stay
+    in the root's plan file for review.
+    """
+    start = time.perf_counter()
+    root = Path(root)
+    if not root.is_dir():
+        raise FileNotFoundError(f"{root} is not a directory")
+    # A root that is applied is leased for the whole run, so its plan cannot go stale under another instance
+    lease = None
+    if apply_changes:
+        lease, holder = acquire_library_lease(root)
+        if lease is None:
+            raise RuntimeError(f"{root} is being organized by {holder}")
+    try:
+        scanned = scan(root, recursive)
+        for warning in scanned.warnings:
+            console.print(f"[yellow]{warning}[/yellow]")
+        matched = match(scanned, tag_with_resolution, decisions_file=DECISIONS_FILE)
+        entries = plan(matched)
+        plan_path = write_plan(entries, root / "FunForge" / "rename_plan.json")
+
+        counts = defaultdict(int)
+        for entry in entries:
+            counts[entry["action"]] += 1
+        applied, errors, held_back = 0, [], 0
+        if apply_changes:
+            settled, unreviewed = [], []
+            for pair in matched.pairs:
+                reviewed = apply_fuzzy or not pair.approved or pair.remembered or pair.by_id
+                (settled if reviewed else unreviewed).append(pair)
+            if unreviewed:
+                held_back = len(unreviewed)
+                entries = plan(matched._replace(pairs=settled))
+            result = apply(entries, root, link_files)
+            applied, errors = result.applied, result.problems + result.errors
+            if unreviewed:
+                # What is left for review replaces the plan that was just applied
+                plan_path = write_plan(plan(matched._replace(exact=[], pairs=unreviewed, unmatched=[])), plan_path)
+    finally:
+        if lease is not None:
+            lease.release()
+
+    files = len(scanned.videos) + len(scanned.funscripts) + len(scanned.subtitles) + len(scanned.archives)
+    return BatchRootResult(str(root), files, dict(counts), applied, errors, time.perf_counter() - start, str(plan_path),
+                           held_back)
+
+def print_batch_summary(results, failures, wall_seconds):
+    """Print one row per root plus the combined totals and throughput."""
+    table = Table(title="Batch Summary", header_style="bold cyan")
+    for column in ("Root", "Files", "Exact", "Renames", "Not Changed", "Applied", "Errors", "Time", "Files/s"):
+        if column == "Root":
+            table.add_column(column, overflow="fold")
+        else:
+            table.add_column(column, justify="right", no_wrap=True)
+    for result in results:
+        table.add_row(
+            result.root, str(result.files), str(result.counts.get("exact", 0)), str(result.counts.get("rename", 0)),
+            str(result.counts.get("not_changed", 0)), str(result.applied), str(len(result.errors)),
+            f"{result.seconds:.1f}s", f"{result.files / result.seconds:.0f}" if result.seconds else "-",
+        )
+    for root, error in failures:
+        table.add_row(f"[red]{root}[/red]", "-", "-", "-", "-", "-", "[red]failed[/red]", "-", "-")
+    console.print(table)
+
+    total_files = sum(result.files for result in results)
+    total_applied = sum(result.applied for result in results)
+    console.print(
+        f"[green]{len(results)} roots done, {len(failures)} failed: {total_files} files in {wall_seconds:.1f}s "
+        f"({total_files / wall_seconds if wall_seconds else 0:.0f} files/s), {total_applied} files moved or linked.[/green]"
+    )
+    for root, error in failures:
+        console.print(f"[red]Error processing {root}: {error}[/red]")
+    for result in results:
+        if result.held_back:
+            console.print(f"[yellow]{result.root}: {result.held_back} fuzzy pairs not applied; review them in {result.plan_path}[/yellow]")
+
+def batch_groups(roots):
+    """
+    Split the roots of a batch run into groups that are processed one root after another:
+    roots on the same spinning disk form one group so parallel scans do not make its heads
+    seek back and forth, every other root is a group of its own.
+    """
+    groups = {}
+    for root in roots:
+        if ADAPTIVE_IO and root.is_dir() and storage_kind(root) == "hdd":
+            groups.setdefault(("hdd", os.stat(root).st_dev), []).append(root)
+        else:
+            groups[("root", root)] = [root]
+    return list(groups.values())
+
+def batch_mode(roots):
+    """
+    CLI: process several library roots in parallel worker processes. The reference
+    lists are read and folded into BUZZWORDS once here and handed to every worker; each root
+    gets a rename plan in its FunForge folder, which is applied right away on request.
+    Runs unattended, so new fuzzy pairs are only applied when asked for explicitly
+    (remembered rejections are kept).
+    """
+    console.print(create_styled_prompt("Scan subdirectories recursively?"))
+    recursive = Confirm.ask("", default=True)
+    console.print(create_styled_prompt("Do you want to tag filenames with resolution information?"))
+    tag_with_resolution = Confirm.ask("", default=False)
+    console.print(create_styled_prompt("Apply the plans right away? (no: only write a plan per root for review)"))
+    apply_changes = Confirm.ask("", default=False)
+    link_files = False
+    apply_fuzzy = False
+    if apply_changes:
+        console.print(create_styled_prompt("Link files instead of moving them (originals stay in place)?"))
+        link_files = Confirm.ask("", default=False)
+        console.print(create_styled_prompt("Also apply new fuzzy pairs without reviewing them? (no: they stay in the plan for review)"))
+        apply_fuzzy = Confirm.ask("", default=False)
+
+    load_reference_indexes()
+    groups = batch_groups(roots)
+    workers = max(1, min(BATCH_WORKERS, len(groups)))
+    console.print(f"[yellow]Processing {len(roots)} roots with {workers} workers...[/yellow]")
+
+    results = []
+    failures = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker,
+                             initargs=(BUZZWORDS,)) as executor:
+        # One root per group is in flight; the next root of a group is submitted when the previous one is done
+        futures = {}
+
+        def submit_next(group):
+            if group:
+                root = group.pop(0)
+                future = executor.submit(process_root, str(root), tag_with_resolution, recursive, apply_changes, link_files, apply_fuzzy)
+                futures[future] = (root, group)
+
+        for group in groups:
+            submit_next(group)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                root, group = futures.pop(future)
+                submit_next(group)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures.append((str(root), str(e)))
+                    console.print(f"[red]✗ {root}: {str(e)}[/red]")
+                    continue
+                results.append(result)
+                console.print(f"[green]✓ {result.root}: {result.files} files in {result.seconds:.1f}s, plan written to {result.plan_path}[/green]")
+
+    results.sort(key=lambda result: roots.index(Path(result.root)))
+    print_batch_summary(results, failures, time.perf_counter() - start)
+
+def cleanup_empty_folders(directory, exclude_dir="FunForge", interactive=True):
+    """
+    Clean up empty folders after processing in a single bottom-up pass.
     
     Args:
         directory (Path): The root directory to start cleaning from
-        exclude_dir (str): Directory name to exclude from cleanup (e.g., 'FunForge')
+        exclude_dir (str): Directory directly under the root to exclude from cleanup (e.g., 'FunForge')
+        interactive (bool): Ask once for all candidates; when False, remove them without asking
     """
-    def is_empty_dir(path):
-        """Check if directory is empty or contains only empty directories."""
-        if exclude_dir in str(path):
-            return False
-        
-        try:
-            # List all items in directory
-            contents = list(path.iterdir())
-            
-            # If no contents, directory is empty
-            if not contents:
-                return True
-                
-            # Check if all contents are directories and are empty
-            return all(item.is_dir() and is_empty_dir(item) for item in contents)
-        except PermissionError:
-            console.print(f"[yellow]Permission denied accessing {path}[/yellow]")
-            return False
-        except Exception as e:
-            console.print(f"[red]Error checking directory {path}: {str(e)}[/red]")
-            return False
+    directory = Path(directory)
+    excluded_path = os.path.normcase(os.path.abspath(directory / exclude_dir))
 
-    def remove_empty_folders(path):
-        """Remove empty folders recursively."""
-        if not path.is_dir() or exclude_dir in str(path):
-            return False
-            
+    def report_walk_error(error):
+        if isinstance(error, PermissionError):
+            console.print(f"[yellow]Permission denied accessing {error.filename}[/yellow]")
+        else:
+            console.print(f"[red]Error checking directory {error.filename}: {str(error)}[/red]")
+
+    console.print("\n[cyan]════════════════ Folder Cleanup ════════════════[/cyan]")
+    console.print("[yellow]Scanning for empty folders...[/yellow]")
+
+    # One top-down listing with the output tree pruned by exact path; walking the
+    # visited directories in reverse then sees every child before its parent.
+    visited = []
+    for root, dirnames, filenames in os.walk(directory, onerror=report_walk_error):
+        if LEASE_FILE_NAME in filenames and Path(root) != directory and foreign_lease(os.path.join(root, LEASE_FILE_NAME)):
+            # Another instance is organizing this folder; its lease file keeps the folder itself
+            dirnames[:] = []
+        kept = [
+            d for d in dirnames
+            if not is_ignored_directory(os.path.join(root, d), str(directory), {excluded_path})
+        ]
+        # A pruned subfolder is never looked into, so it keeps its parent like a file would
+        pruned = len(kept) < len(dirnames)
+        dirnames[:] = kept
+        visited.append((root, dirnames, bool(filenames) or pruned))
+
+    empty_dirs = set()
+    candidates = []
+    for root, dirnames, has_files in reversed(visited):
+        if has_files:
+            continue
+        # Symlinked directories are never removed and keep their parent alive
+        if all(os.path.join(root, d) in empty_dirs and not os.path.islink(os.path.join(root, d))
+               for d in dirnames):
+            empty_dirs.add(root)
+            if Path(root) != directory:
+                candidates.append(Path(root))
+
+    if not candidates:
+        console.print("\n[green]No empty folders found.[/green]")
+        return []
+
+    console.print(f"\nFound [yellow]{len(candidates)}[/yellow] empty folders:")
+    for path in candidates[:CLEANUP_PREVIEW_LIMIT]:
+        console.print(f"  - [yellow]{path}[/yellow]")
+    if len(candidates) > CLEANUP_PREVIEW_LIMIT:
+        console.print(f"  ... and {len(candidates) - CLEANUP_PREVIEW_LIMIT} more")
+
+    if interactive:
+        console.print(create_styled_prompt(f"Delete all {len(candidates)} empty folders?"))
+        if not Confirm.ask("", default=True):
+            console.print("\n[yellow]Folder cleanup skipped.[/yellow]")
+            return []
+
+    # Candidates are ordered children-first, so every rmdir sees an empty folder
+    removed = []
+    for path in candidates:
         try:
-            # Process all subdirectories first
-            for item in path.iterdir():
-                if item.is_dir():
-                    remove_empty_folders(item)
-            
-            # After processing subdirectories, check if current directory is empty
-            if is_empty_dir(path) and path != directory and exclude_dir not in str(path):
-                # Ask user before deleting
-                console.print(f"\nFound empty folder: [yellow]{path}[/yellow]")
-                if Confirm.ask("Delete this empty folder?", default=True):
-                    path.rmdir()
-                    console.print(f"[green]Deleted empty folder: {path}[/green]")
-                    return True
-                
+            path.rmdir()
+            removed.append(path)
         except PermissionError:
-            console.print(f"[yellow]Permission denied accessing {path}[/yellow]")
+            console.print(f"[yellow]Permission denied removing {path}[/yellow]")
         except Exception as e:
-            console.print(f"[red]Error processing directory {path}: {str(e)}[/red]")
-        
-        return False
+            console.print(f"[red]Error removing directory {path}: {str(e)}[/red]")
 
-    console.print("\n[cyan]════════════════ Folder Cleanup ════════════════[/cyan]")
-    console.print("[yellow]Scanning for empty folders...[/yellow]")
-    
-    # Start the cleanup process from the root directory
-    remove_empty_folders(Path(directory))
-    
-    console.print("\n[green]Folder cleanup complete.[/green]")
+    console.print(f"\n[green]Folder cleanup complete. Deleted {len(removed)} empty folders.[/green]")
+    return removed
 
 def typewriter_effect(text, delay=0.05, color="rgb(48,209,204)"):
     """Display text with a typewriter effect and optional color."""
@@ -1140,6 +4077,86 @@ def matrix_animation(text, delay=0.05):
         console.print(line, style="rgb(48,209,204)", highlight=False)
         time.sleep(delay)
 
+def run_session(directory, plan_only=False):
+    """Ask for the session settings, then run FunForge on a directory (or only plan the run)."""
+    # Get critical settings first
+    console.print(create_styled_prompt("Scan subdirectories recursively?"))
+    recursive = Confirm.ask("", default=True)
+
+    if not plan_only:
+        console.print(create_styled_prompt("Should archives in the target directory be extracted?"))
+        handle_archives_flag = Confirm.ask("", default=True)
+    
+    # Then get other preferences
+    console.print(create_styled_prompt("Do you want to tag filenames with resolution information?"))
+    tag_with_resolution = Confirm.ask("", default=False)
+    
+    if not plan_only:
+        console.print(create_styled_prompt("Do you want to perform a dry run?"))
+        dry_run = Confirm.ask("", default=False)
+
+        console.print(create_styled_prompt("Link files into FunForge instead of moving them (originals stay in place, e.g. for seeding)?"))
+        link_files = Confirm.ask("", default=False)
+
+        console.print(create_styled_prompt("Show detailed progress when moving exact matches?"))
+        show_exact_matches = Confirm.ask("", default=True)
+
+        console.print(create_styled_prompt("Review pairs in a table while matching continues in the background?"))
+        batch_review = Confirm.ask("", default=True)
+
+    # Load reference names and refine buzzwords
+    reference_names = load_reference_indexes()
+    console.print(f"[cyan]Detected {describe_storage_profile(use_storage_profile(directory))}[/cyan]")
+
+    if plan_only:
+        plan_mode(directory, tag_with_resolution, recursive)
+        return
+
+    # Handle archives first if requested
+    extracted_dirs = []
+    if handle_archives_flag:
+        extracted_dirs = handle_archives(directory)
+        if extracted_dirs:
+            console.print("\n[yellow]Processing remaining unmatched files...[/yellow]")
+
+    # Only one instance renames and cleans up a folder at a time (archives are leased one by one above)
+    lease = None
+    if not dry_run:
+        lease, holder = acquire_library_lease(directory)
+        if lease is None:
+            console.print(f"\n[yellow]{directory} is being organized by {holder}; leaving renaming and cleanup to it.[/yellow]")
+            return
+
+    try:
+        # Always process the main directory
+        rename_files(directory, reference_names, tag_with_resolution, 
+                    recursive=recursive, 
+                    dry_run=dry_run,
+                    show_exact_matches=show_exact_matches,  # Make sure this parameter is being passed
+                    link_files=link_files,
+                    batch_review=batch_review)
+
+        # Another pass over the folders holding unmatched archive files. handle_archives returns the
+        # library folder itself, so it contains the originals too and link mode must be kept.
+        for extracted_dir in extracted_dirs:
+            console.print(f"\n[yellow]Processing files from archive: {extracted_dir.name}[/yellow]")
+            rename_files(extracted_dir, 
+                        reference_names, 
+                        tag_with_resolution, 
+                        recursive=True, 
+                        dry_run=dry_run,
+                        show_exact_matches=show_exact_matches,  # Make sure this parameter is being passed
+                        link_files=link_files,
+                        batch_review=batch_review)
+
+        # Add cleanup process for recursive mode
+        if recursive:
+            console.print("\n[yellow]Checking for empty folders to clean up...[/yellow]")
+            cleanup_empty_folders(directory)
+    finally:
+        if lease is not None:
+            lease.release()
+
 def main():
     def optimize_system():
         """Optimize system settings for better I/O performance."""
@@ -1153,13 +4170,18 @@ def main():
             if os.name == 'nt':  # Windows
                 process.nice(psutil.HIGH_PRIORITY_CLASS)
                 optimization_status.append("[green]Windows process priority optimization enabled[/green]")
-            else:  # Unix-like systems
+            elif os.geteuid() == 0:  # Unix-like systems; only root may raise its priority
                 process.nice(-10)  # Higher priority on Unix systems
                 optimization_status.append("[green]Unix process priority optimization enabled[/green]")
+            else:
+                optimization_status.append("[yellow]Process priority unchanged (raising it needs root)[/yellow]")
             
-            # Optimize I/O priority if possible
-            if hasattr(psutil, 'IOPRIO_CLASS_HIGH'):
-                process.ionice(psutil.IOPRIO_CLASS_HIGH)
+            # Optimize I/O priority if possible: the top best-effort level needs no privileges on Linux
+            if hasattr(psutil, 'IOPRIO_HIGH'):
+                process.ionice(psutil.IOPRIO_HIGH)
+                optimization_status.append("[green]I/O priority optimization enabled[/green]")
+            elif hasattr(psutil, 'IOPRIO_CLASS_BE'):
+                process.ionice(psutil.IOPRIO_CLASS_BE, value=0)
                 optimization_status.append("[green]I/O priority optimization enabled[/green]")
                 
         except ImportError:
@@ -1167,13 +4189,11 @@ def main():
         except Exception as e:
             optimization_status.append(f"[yellow]Process optimization failed: {str(e)}[/yellow]")
 
-        # Optional: Set Python's internal buffer size
-        try:
-            import io
-            io.DEFAULT_BUFFER_SIZE = 1024 * 1024  # 1MB buffer
-            optimization_status.append("[green]Python I/O buffer optimization enabled[/green]")
-        except Exception as e:
-            optimization_status.append("[yellow]Buffer optimization failed[/yellow]")
+        # Worker counts, chunk sizes and read-ahead are chosen per library once its storage is known
+        if ADAPTIVE_IO:
+            optimization_status.append("[green]Storage-aware I/O tuning enabled[/green]")
+        else:
+            optimization_status.append("[yellow]Storage-aware I/O tuning disabled (ADAPTIVE_IO)[/yellow]")
 
         return optimization_status
 
@@ -1208,67 +4228,29 @@ def main():
         console.print(status)
     console.print("[cyan]══════════════════════════════════════════════════[/cyan]\n")
 
-    # Update prompts in main function
+    # Update prompts in main function; several roots separated by os.pathsep start a batch run
     while True:
-        directory_input = input("Enter the directory containing the files: ").strip()
-        directory = Path(directory_input)
-        if directory.is_dir():
+        directory_input = input(f"Enter the directory containing the files (several separated by '{os.pathsep}' for a batch run): ").strip()
+        roots = [Path(part.strip()) for part in directory_input.split(os.pathsep) if part.strip()]
+        invalid = [str(root) for root in roots if not root.is_dir()]
+        if roots and not invalid:
             break
-        console.print(f"[red]Error: {directory_input} is not a valid directory. Please try again.[/red]")
-
-    # Get critical settings first
-    console.print(create_styled_prompt("Scan subdirectories recursively?"))
-    recursive = Confirm.ask("", default=True)
-    
-    console.print(create_styled_prompt("Should archives in the target directory be extracted?"))
-    handle_archives_flag = Confirm.ask("", default=True)
-    
-    # Then get other preferences
-    console.print(create_styled_prompt("Do you want to tag filenames with resolution information?"))
-    tag_with_resolution = Confirm.ask("", default=False)
-    
-    console.print(create_styled_prompt("Do you want to perform a dry run?"))
-    dry_run = Confirm.ask("", default=False)
-
-    console.print(create_styled_prompt("Show detailed progress when moving exact matches?"))
-    show_exact_matches = Confirm.ask("", default=True)
-
-    # Load reference names and refine buzzwords
-    reference_files = ['names_1.txt', 'names_2.txt', 'names_3.txt']
-    try:
-        reference_names = load_reference_names(reference_files)
-        refine_buzzwords(reference_files)
-    except Exception as e:
-        console.print(f"[yellow]Warning: Could not load reference files: {str(e)}[/yellow]")
-        reference_names = set()
+        console.print(f"[red]Error: {', '.join(invalid) or directory_input} is not a valid directory. Please try again.[/red]")
+    directory = roots[0]
 
-    # Handle archives first if requested
-    extracted_dirs = []
-    if handle_archives_flag:
-        extracted_dirs = handle_archives(directory)
-        if extracted_dirs:
-            console.print("\n[yellow]Processing remaining unmatched files...[/yellow]")
+    if len(roots) > 1:
+        batch_mode(roots)
+    else:
+        # run: interactive session, plan: write a rename plan file, apply: execute a plan file
+        console.print(create_styled_prompt("Choose a mode: run (interactive), plan (write a rename plan) or apply (execute a plan)"))
+        mode = Prompt.ask("", choices=["run", "plan", "apply"], default="run")
 
-    # Always process the main directory
-    rename_files(directory, reference_names, tag_with_resolution, 
-                recursive=recursive, 
-                dry_run=dry_run,
-                show_exact_matches=show_exact_matches)  # Make sure this parameter is being passed
-
-    # Process each extracted directory
-    for extracted_dir in extracted_dirs:
-        console.print(f"\n[yellow]Processing files from archive: {extracted_dir.name}[/yellow]")
-        rename_files(extracted_dir, 
-                    reference_names, 
-                    tag_with_resolution, 
-                    recursive=True, 
-                    dry_run=dry_run,
-                    show_exact_matches=show_exact_matches)  # Make sure this parameter is being passed
+        if mode == "apply":
+            apply_mode(directory)
+        else:
+            run_session(directory, plan_only=(mode == "plan"))
 
-    # Add cleanup process for recursive mode
-    if recursive:
-        console.print("\n[yellow]Checking for empty folders to clean up...[/yellow]")
-        cleanup_empty_folders(directory)
+    # Final user confirmation before closing
 
     # Final user confirmation before closing
     while True:
@@ -0,0 +1,159 @@
+import errno
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import funforge
+
+
+def write_lease(path, owner="otherhost:1", age=0):
+    path.write_text(json.dumps({"owner": owner, "acquired": time.time() - age}), encoding="utf-8")
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+
+
+def read_owner(path):
+    return json.loads(path.read_text(encoding="utf-8"))["owner"]
+
+
+def test_live_foreign_lease_blocks(tmp_path):
+    path = tmp_path / funforge.LEASE_FILE_NAME
+    write_lease(path)
+    lease = funforge.Lease(path)
+    assert not lease.acquire()
+    assert lease.holder() == "otherhost:1"
+    assert funforge.foreign_lease(path) == "otherhost:1"
+
+
+def test_stale_lease_is_taken_over(tmp_path):
+    path = tmp_path / funforge.LEASE_FILE_NAME
+    write_lease(path, age=funforge.LEASE_TIMEOUT + 60)
+    assert funforge.foreign_lease(path) is None
+    lease = funforge.Lease(path)
+    assert lease.acquire()
+    try:
+        assert lease.held()
+        assert not os.path.exists(f"{path}.takeover")
+    finally:
+        lease.release()
+    assert not path.exists()
+
+
+def test_second_taker_fails_while_lease_is_held(tmp_path):
+    path = tmp_path / funforge.LEASE_FILE_NAME
+    first = funforge.Lease(path)
+    assert first.acquire()
+    try:
+        assert not funforge.Lease(path).acquire()
+        assert first.held()
+    finally:
+        first.release()
+
+
+def test_concurrent_takeovers_of_a_stale_lease_have_one_winner(tmp_path):
+    path = tmp_path / funforge.LEASE_FILE_NAME
+    write_lease(path, age=funforge.LEASE_TIMEOUT + 60)
+    leases = [funforge.Lease(path) for _ in range(8)]
+    barrier = threading.Barrier(len(leases))
+    acquired = []
+
+    def take(lease):
+        barrier.wait()
+        if lease.acquire():
+            acquired.append(lease)
+
+    threads = [threading.Thread(target=take, args=(lease,)) for lease in leases]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert len(acquired) == 1
+    finally:
+        for lease in acquired:
+            lease.release()
+
+
+def test_takeover_in_progress_blocks_takeover(tmp_path):
+    path = tmp_path / funforge.LEASE_FILE_NAME
+    write_lease(path, age=funforge.LEASE_TIMEOUT + 60)
+    takeover = tmp_path / (funforge.LEASE_FILE_NAME + ".takeover")
+    takeover.touch()
+    assert not funforge.Lease(path).acquire()
+    assert read_owner(path) == "otherhost:1"
+
+    # A takeover file left by an instance that died is cleared, and the next attempt succeeds
+    stamp = time.time() - funforge.LEASE_TIMEOUT - 60
+    os.utime(takeover, (stamp, stamp))
+    assert not funforge.Lease(path).acquire()
+    assert not takeover.exists()
+    lease = funforge.Lease(path)
+    assert lease.acquire()
+    lease.release()
+
+
+def test_lease_taken_over_is_not_released(tmp_path):
+    path = tmp_path / funforge.LEASE_FILE_NAME
+    lease = funforge.Lease(path)
+    assert lease.acquire()
+    write_lease(path)
+    assert not lease.held()
+    lease.release()
+    assert read_owner(path) == "otherhost:1"
+
+
+def test_library_lease_fails_below_a_leased_folder(tmp_path):
+    write_lease(tmp_path / funforge.LEASE_FILE_NAME)
+    library = tmp_path / "library"
+    library.mkdir()
+    lease, holder = funforge.acquire_library_lease(library)
+    assert lease is None and "otherhost:1" in holder
+    assert not (library / funforge.LEASE_FILE_NAME).exists()
+
+
+def test_move_no_clobber(tmp_path):
+    source, target = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    source.write_bytes(b"video")
+    funforge.move_no_clobber(source, target)
+    assert not source.exists() and target.read_bytes() == b"video"
+
+    source.write_bytes(b"other")
+    with pytest.raises(FileExistsError):
+        funforge.move_no_clobber(source, target)
+    assert source.read_bytes() == b"other" and target.read_bytes() == b"video"
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows renames never replace a file")
+@pytest.mark.parametrize("code", [errno.EPERM, errno.EOPNOTSUPP])
+def test_move_no_clobber_without_hardlinks(tmp_path, monkeypatch, code):
+    def no_link(source, target):
+        raise OSError(code, os.strerror(code), os.fspath(target))
+
+    monkeypatch.setattr(funforge.os, "link", no_link)
+    source, target = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    source.write_bytes(b"video")
+    funforge.move_no_clobber(source, target)
+    assert not source.exists() and target.read_bytes() == b"video"
+
+    source.write_bytes(b"other")
+    with pytest.raises(FileExistsError):
+        funforge.move_no_clobber(source, target)
+    assert source.read_bytes() == b"other" and target.read_bytes() == b"video"
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows renames never replace a file")
+def test_move_no_clobber_passes_other_link_errors_on(tmp_path, monkeypatch):
+    def no_link(source, target):
+        raise OSError(errno.EIO, os.strerror(errno.EIO), os.fspath(target))
+
+    monkeypatch.setattr(funforge.os, "link", no_link)
+    source = tmp_path / "a.mp4"
+    source.write_bytes(b"video")
+    with pytest.raises(OSError) as error:
+        funforge.move_no_clobber(source, tmp_path / "b.mp4")
+    assert error.value.errno == errno.EIO
+    assert source.exists() and not (tmp_path / "b.mp4").exists()
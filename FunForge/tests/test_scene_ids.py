@@ -0,0 +1,55 @@
+import pytest
+
+import funforge
+
+
+def make_files(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+
+def pairs(root):
+    return {
+        (decision.proposal.video_path.name, decision.proposal.script_path.name): decision
+        for decision in funforge.match(funforge.scan(root)).pairs
+    }
+
+
+@pytest.mark.parametrize("name", ["Beach HEVC265", "Sunset FHD1080", "Trip UHD2160", "Dome VR180", "Scene123"])
+def test_codec_and_resolution_tags_are_not_codes(name):
+    assert not {value for kind, value in funforge.scene_ids(name) if kind == "code"}
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("ABC-123 Beach Day", ("code", "abc-123")),
+    ("abc123_final_v2", ("code", "abc-123")),
+    ("Studio Trip 2021-03-04", ("date", "2021-3-4")),
+    ("Sunset Part 01", ("scene", "1")),
+])
+def test_scene_ids(name, expected):
+    assert expected in funforge.scene_ids(name)
+
+
+def test_shared_part_number_does_not_pair_unrelated_titles(tmp_path):
+    make_files(tmp_path, ["Alpha Part 1.mp4", "Zeta Omega Part 1.funscript"])
+    assert ("Alpha Part 1.mp4", "Zeta Omega Part 1.funscript") not in pairs(tmp_path)
+
+
+def test_shared_codec_tag_does_not_pair_unrelated_titles(tmp_path):
+    make_files(tmp_path, ["Beach HEVC265.mp4", "Mountain Road HEVC265.funscript"])
+    assert not any(decision.by_id for decision in pairs(tmp_path).values())
+
+
+def test_unique_studio_code_pairs_across_folders(tmp_path):
+    make_files(tmp_path, ["a/ABC-123 Beach Day.mp4", "b/abc123_final_v2.funscript"])
+    decision = pairs(tmp_path)[("ABC-123 Beach Day.mp4", "abc123_final_v2.funscript")]
+    assert decision.by_id and decision.score == 100
+
+
+def test_different_part_number_vetoes_fuzzy_match(tmp_path):
+    make_files(tmp_path, ["Sunset Part 1.mp4", "sunset part 2.funscript", "sunset part 1 remix.funscript"])
+    found = pairs(tmp_path)
+    assert ("Sunset Part 1.mp4", "sunset part 2.funscript") not in found
+    assert ("Sunset Part 1.mp4", "sunset part 1 remix.funscript") in found